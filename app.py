@@ -1,18 +1,26 @@
 
 from __future__ import annotations
-import sys
+import os, sys, multiprocessing
 from pathlib import Path
 from PySide6 import QtWidgets
 from ishtar.ui.windows.main import MainWindow, apply_dark_palette
 from ishtar.io.storage import Storage
+from ishtar.io.sqlite_store import SqliteStorage
 
 def main():
     root = Path(__file__).resolve().parent
     app = QtWidgets.QApplication(sys.argv)
     apply_dark_palette(app)
-    win = MainWindow(Storage(root))
+    packed = os.environ.get("ISHTAR_TREES", "").lower() == "packed"
+    if os.environ.get("ISHTAR_STORAGE", "").lower() == "sqlite":
+        storage = SqliteStorage(root, workers=None, packed=packed)
+        if not storage.list_characters(): storage.migrate_json_characters()
+    else:
+        storage = Storage(root, workers=None, packed=packed)
+    win = MainWindow(storage)
     win.show()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # process-pool tree loading in frozen builds
     main()
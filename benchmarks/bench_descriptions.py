@@ -0,0 +1,47 @@
+from __future__ import annotations
+# Resident memory of node descriptions: eager vs. lazy, on the bundled trees
+# copied N times with their descriptions padded to realistic Markdown length.
+#   python benchmarks/bench_descriptions.py [copies] [desc_chars]
+import json, sys, tempfile, tracemalloc
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from ishtar.core.models import SkillTree, JsonDescriptions
+
+def scale_up(out: Path, copies: int, desc_chars: int) -> None:
+    filler = ("## Effect\n- lorem *ipsum* dolor sit amet\n" * (desc_chars // 40 + 1))[:desc_chars]
+    for src in sorted((ROOT / "data" / "trees").glob("*.json")):
+        data = json.loads(src.read_text(encoding="utf-8"))
+        for i in range(copies):
+            d = dict(data, id=f"{data['id']}_{i}")
+            d["nodes"] = [dict(n, description=(n.get("description") or "") + "\n\n" + filler) for n in data["nodes"]]
+            (out / f"{d['id']}.json").write_text(json.dumps(d), encoding="utf-8")
+
+def measure(paths, lazy: bool, read_fraction: float) -> float:
+    tracemalloc.start()
+    trees = []
+    for p in paths:
+        data = json.loads(p.read_text(encoding="utf-8"))
+        trees.append(SkillTree.from_dict(data, source=JsonDescriptions(p) if lazy else None))
+        del data
+    for t in trees[:int(len(trees) * read_fraction)]:
+        for n in t.nodes.values(): n.description
+    cur, _ = tracemalloc.get_traced_memory(); tracemalloc.stop()
+    return cur / 1e6
+
+def main():
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    desc_chars = int(sys.argv[2]) if len(sys.argv) > 2 else 1500
+    with tempfile.TemporaryDirectory() as tmp:
+        d = Path(tmp); scale_up(d, copies, desc_chars)
+        paths = sorted(d.glob("*.json"))
+        nodes = sum(len(json.loads(p.read_text())["nodes"]) for p in paths)
+        print(f"{len(paths)} trees, {nodes} nodes, ~{desc_chars} chars per description")
+        eager = measure(paths, False, 0.0)
+        print(f"eager                   {eager:8.1f} MB")
+        for frac in (0.0, 0.01, 0.1):
+            lazy = measure(paths, True, frac)
+            print(f"lazy, {frac:4.0%} trees read    {lazy:8.1f} MB   saved {eager - lazy:8.1f} MB")
+
+if __name__ == "__main__":
+    main()
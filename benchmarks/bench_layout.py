@@ -0,0 +1,42 @@
+from __future__ import annotations
+# layout_tree on 100k-node synthetic trees: a deep chain (the old recursive layout
+# overflowed the stack there), a bushy random tree and a wide, shallow one.
+#   python benchmarks/bench_layout.py [n_nodes]
+import random, sys, time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ishtar.core.models import SkillTree, SkillNode
+from ishtar.layout.engine import MODES, layout_tree
+
+def chain_tree(n: int) -> SkillTree:
+    t = SkillTree("chain", "Chain")
+    for i in range(n):
+        t.nodes[f"n{i}"] = SkillNode(f"n{i}", f"N{i}", 1, "", [f"n{i-1}"] if i else [], 0)
+    return t
+
+def random_tree(n: int, seed: int = 1) -> SkillTree:
+    # parents drawn from a recent window, which gives long uneven branches
+    rnd = random.Random(seed); t = SkillTree("rand", "Random")
+    for i in range(n):
+        p = [f"n{rnd.randrange(max(0, i - 200), i)}"] if i and rnd.random() > 0.0005 else []
+        t.nodes[f"n{i}"] = SkillNode(f"n{i}", f"N{i}", 1, "", p, 0)
+    return t
+
+def wide_tree(n: int, fanout: int = 12) -> SkillTree:
+    t = SkillTree("wide", "Wide")
+    for i in range(n):
+        t.nodes[f"n{i}"] = SkillNode(f"n{i}", f"N{i}", 1, "", [f"n{(i - 1) // fanout}"] if i else [], 0)
+    return t
+
+def run(label: str, t: SkillTree) -> None:
+    t.index  # build the topology outside the timed region
+    for mode in MODES:
+        t0 = time.perf_counter(); L = layout_tree(t, mode); dt = time.perf_counter() - t0
+        x0, y0, x1, y1 = L.bounds()
+        print(f"{label:8s} {mode:10s} nodes={len(L):7d}  {dt*1000:8.1f} ms  scene {x1 - x0:12.0f} x {y1 - y0:10.0f}")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    run("chain", chain_tree(n))
+    run("random", random_tree(n))
+    run("wide", wide_tree(n))
@@ -0,0 +1,43 @@
+from __future__ import annotations
+# Cold-start tree loading vs. worker count on a synthetic library.
+#   python benchmarks/bench_load_trees.py [n_files] [nodes_per_tree]
+import json, os, sys, tempfile, time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ishtar.io.catalog import TreeCatalog
+
+def make_library(d: Path, n_files: int, n_nodes: int) -> None:
+    for i in range(n_files):
+        nodes = []
+        for j in range(n_nodes):
+            nodes.append({
+                "id": f"t{i}_n{j}", "name": f"Node {j}", "cost": 1 + j % 5,
+                "description": "Lorem ipsum dolor sit amet. " * 4,
+                "prereq": [f"t{i}_n{(j - 1) // 2}"] if j else [],
+                "ichor_rank": ["Bloodling", "Neophyte", "Scion"][j % 3],
+            })
+        data = {"id": f"tree_{i}", "name": f"Tree {i}", "description": "", "nodes": nodes}
+        (d / f"tree_{i}.json").write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_nodes = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, 8, 16, cpus} & set(range(1, cpus + 1))) or [1]
+    with tempfile.TemporaryDirectory() as tmp:
+        d = Path(tmp)
+        t0 = time.perf_counter(); make_library(d, n_files, n_nodes)
+        print(f"generated {n_files} files x {n_nodes} nodes in {time.perf_counter()-t0:.2f}s ({cpus} cpus)")
+        base = None
+        for executor in ("process", "thread"):
+            for w in counts:
+                cat = TreeCatalog(d, workers=w, executor=executor)
+                t0 = time.perf_counter(); cat.refresh(); dt = time.perf_counter() - t0
+                base = base or dt
+                print(f"{executor:8s} workers={w:<3d} {dt:7.2f}s  speedup x{base/dt:4.2f}  trees={len(cat.trees())}")
+        cat = TreeCatalog(d)
+        cat.refresh(); t0 = time.perf_counter(); cat.refresh()
+        print(f"warm refresh (nothing changed)  {time.perf_counter()-t0:7.3f}s")
+
+if __name__ == "__main__":
+    main()
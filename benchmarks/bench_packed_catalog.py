@@ -0,0 +1,49 @@
+from __future__ import annotations
+# Startup time and memory: JSON tree directory vs. the packed mmap catalog.
+#   python benchmarks/bench_packed_catalog.py [n_files] [nodes_per_tree]
+import subprocess, sys, tempfile, time
+from pathlib import Path
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT)); sys.path.insert(0, str(ROOT / "benchmarks"))
+from bench_load_trees import make_library
+
+PROBE = r"""
+import resource, sys, time, tracemalloc
+sys.path.insert(0, {root!r})
+from pathlib import Path
+tracemalloc.start()
+t0 = time.perf_counter()
+if {mode!r} == "json":
+    from ishtar.io.catalog import TreeCatalog
+    cat = TreeCatalog(Path({trees!r})); cat.refresh(); trees = cat.trees()
+else:
+    from ishtar.io.packed import PackedCatalog
+    cat = PackedCatalog(Path({pack!r})); trees = cat.trees()
+t_open = time.perf_counter() - t0
+t = trees[sorted(trees)[0]]; sum(n.cost for n in t.nodes.values())  # open one tree
+cur, peak = tracemalloc.get_traced_memory()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(f"{{t_open*1000:9.1f}} ms  heap={{cur/1e6:7.1f}} MB  peak={{peak/1e6:7.1f}} MB  maxrss={{rss/1024:7.1f}} MB  trees={{len(trees)}}")
+"""
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_nodes = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    with tempfile.TemporaryDirectory() as tmp:
+        d = Path(tmp) / "trees"; d.mkdir()
+        make_library(d, n_files, n_nodes)
+        from ishtar.io.catalog import TreeCatalog
+        from ishtar.io.packed import write_packed
+        cat = TreeCatalog(d); cat.refresh(); trees = cat.trees()
+        pack = Path(tmp) / "trees.ishpack"
+        t0 = time.perf_counter(); size = write_packed(pack, (trees[k] for k in sorted(trees)))
+        json_size = sum(p.stat().st_size for p in d.glob("*.json"))
+        print(f"{n_files} trees x {n_nodes} nodes: json {json_size/1e6:.1f} MB, packed {size/1e6:.1f} MB "
+              f"(written in {time.perf_counter()-t0:.2f}s)")
+        for mode in ("json", "packed"):
+            code = PROBE.format(root=str(ROOT), mode=mode, trees=str(d), pack=str(pack))
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+            print(f"{mode:7s}", (out.stdout or out.stderr).strip())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+# validate_tree on 100k-node synthetic trees, including a 50k-deep chain and cycles.
+#   python benchmarks/bench_validate.py [n_nodes]
+import random, sys, time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ishtar.core.models import SkillTree, SkillNode
+from ishtar.core.validation import diagnose_tree
+
+def chain_tree(n: int) -> SkillTree:
+    t = SkillTree("chain", "Chain")
+    for i in range(n):
+        t.nodes[f"n{i}"] = SkillNode(f"n{i}", f"N{i}", 1, "", [f"n{i-1}"] if i else [], 0)
+    return t
+
+def random_tree(n: int, seed: int = 1) -> SkillTree:
+    rnd = random.Random(seed); t = SkillTree("rand", "Random")
+    for i in range(n):
+        p = [f"n{rnd.randrange(i)}"] if i and rnd.random() > 0.001 else []
+        t.nodes[f"n{i}"] = SkillNode(f"n{i}", f"N{i}", 1, "", p, rnd.randrange(6))
+    return t
+
+def mixed_tree(n: int) -> SkillTree:
+    # half a deep chain, half random, plus a few cycles and orphans
+    t = chain_tree(n // 2)
+    rnd = random.Random(2)
+    for i in range(n // 2, n):
+        t.nodes[f"n{i}"] = SkillNode(f"n{i}", f"N{i}", 1, "", [f"n{rnd.randrange(i)}"], 0)
+    for k in range(10):
+        a, b = f"c{k}a", f"c{k}b"
+        t.nodes[a] = SkillNode(a, a, 1, "", [b]); t.nodes[b] = SkillNode(b, b, 1, "", [a])
+        t.nodes[f"o{k}"] = SkillNode(f"o{k}", "orphan", 1, "", [f"missing{k}"])
+    return t
+
+def run(label: str, t: SkillTree) -> None:
+    t0 = time.perf_counter(); diags = diagnose_tree(t); dt = time.perf_counter() - t0
+    codes = {}
+    for d in diags: codes[d.code] = codes.get(d.code, 0) + 1
+    print(f"{label:22s} nodes={len(t.nodes):7d}  {dt*1000:8.1f} ms  {codes}")
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    run("chain (depth n/2)", chain_tree(n // 2))
+    run("random", random_tree(n))
+    run("chain+random+cycles", mixed_tree(n))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+import base64
+from typing import Iterable, Iterator
+from .topology import TreeIndex
+
+def _popcount(b: int) -> int:
+    return b.bit_count() if hasattr(b, "bit_count") else bin(b).count("1")
+
+# Unlock state of one tree as an int bitset over TreeIndex.slot_ids (sorted node
+# ids). Set algebra and popcount run on machine words instead of str hashing;
+# ids unknown to the tree are dropped on conversion. Bits are tied to the node-id
+# set through TreeIndex.slots_key; rebase() carries them over to a new index.
+class UnlockBits:
+    __slots__ = ("index", "bits")
+
+    def __init__(self, index: TreeIndex, bits: int = 0):
+        self.index = index
+        self.bits = bits
+
+    @staticmethod
+    def from_ids(index: TreeIndex, ids: Iterable[str]) -> "UnlockBits":
+        slot_of = index.slot_of; b = 0
+        for nid in ids:
+            i = slot_of.get(nid)
+            if i is not None: b |= 1 << i
+        return UnlockBits(index, b)
+
+    def ids(self) -> Iterator[str]:
+        slot_ids = self.index.slot_ids; b = self.bits
+        while b:
+            low = b & -b
+            yield slot_ids[low.bit_length() - 1]
+            b ^= low
+
+    def to_set(self) -> set:
+        return set(self.ids())
+
+    def __contains__(self, nid: str) -> bool:
+        i = self.index.slot_of.get(nid)
+        return i is not None and bool(self.bits >> i & 1)
+
+    def __len__(self) -> int:
+        return _popcount(self.bits)
+
+    def _same(self, other: "UnlockBits") -> None:
+        if other.index is not self.index and other.index.slots_key != self.index.slots_key:
+            raise ValueError("UnlockBits belong to different trees.")
+
+    def matches(self, index: TreeIndex) -> bool:
+        # slot numbers still mean the same nodes in `index`
+        return index is self.index or index.slots_key == self.index.slots_key
+
+    def rebase(self, index: TreeIndex) -> "UnlockBits":
+        # same ids on another index of the tree; ids the tree lost are dropped
+        return UnlockBits(index, self.bits) if self.matches(index) else UnlockBits.from_ids(index, self.ids())
+
+    def add(self, nid: str) -> None:
+        i = self.index.slot_of.get(nid)
+        if i is not None: self.bits |= 1 << i
+
+    def update(self, ids: Iterable[str]) -> None:
+        self.bits |= UnlockBits.from_ids(self.index, ids).bits
+
+    def discard(self, nid: str) -> None:
+        i = self.index.slot_of.get(nid)
+        if i is not None: self.bits &= ~(1 << i)
+
+    def __or__(self, other: "UnlockBits") -> "UnlockBits":
+        self._same(other); return UnlockBits(self.index, self.bits | other.bits)
+
+    def __and__(self, other: "UnlockBits") -> "UnlockBits":
+        self._same(other); return UnlockBits(self.index, self.bits & other.bits)
+
+    def __sub__(self, other: "UnlockBits") -> "UnlockBits":
+        self._same(other); return UnlockBits(self.index, self.bits & ~other.bits)
+
+    def __xor__(self, other: "UnlockBits") -> "UnlockBits":
+        self._same(other); return UnlockBits(self.index, self.bits ^ other.bits)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, UnlockBits) and self.bits == other.bits and self.index.slots_key == other.index.slots_key
+
+    def __repr__(self) -> str:
+        return f"UnlockBits({len(self)}/{len(self.index.slot_ids)})"
+
+    # ---- compact text form: "<n slots>:<slots_key hex>:<base64 little-endian bits>" ----
+    def encode(self) -> str:
+        n = len(self.index.slot_ids)
+        raw = self.bits.to_bytes((n + 7) // 8, "little")
+        return f"{n}:{self.index.slots_key.hex()}:{base64.b64encode(raw).decode('ascii')}"
+
+    @staticmethod
+    def decode(index: TreeIndex, text: str) -> "UnlockBits":
+        parts = text.split(":")
+        if len(parts) != 3: raise ValueError("Malformed unlock state.")
+        n, key, data = parts
+        if int(n) != len(index.slot_ids) or key != index.slots_key.hex():
+            raise ValueError("Encoded unlock state was made for a different set of nodes.")
+        bits = int.from_bytes(base64.b64decode(data), "little")
+        if bits >> int(n): raise ValueError("Encoded unlock state has bits past the last node.")
+        return UnlockBits(index, bits)
@@ -0,0 +1,61 @@
+from __future__ import annotations
+from enum import IntEnum
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .models import SkillTree, rank_name
+
+class NodeState(IntEnum):
+    UNLOCKED = 0
+    AVAILABLE = 1
+    RANK_BLOCKED = 2
+    PREREQ_BLOCKED = 3
+
+# Whole-tree unlock state for one view (character or planning overlay).
+# A node's state only depends on its own unlock flag, the character rank and
+# whether all its prerequisites are unlocked, so a toggle re-evaluates the node
+# and its direct dependents; a rank change re-evaluates everything in one pass.
+class BlockEngine:
+    def __init__(self, tree: SkillTree, unlocked: Iterable[str], rank: int):
+        self.tree = tree
+        self.unlocked: Set[str] = set(unlocked)
+        self.rank = rank
+        self.states: Dict[str, NodeState] = {}
+        self.reasons: Dict[str, Optional[str]] = {}
+        self.evaluate_all()
+
+    def _eval(self, nid: str) -> Tuple[NodeState, Optional[str]]:
+        if nid in self.unlocked:
+            return NodeState.UNLOCKED, None
+        node = self.tree.nodes[nid]
+        if node.ichor_rank > self.rank:
+            return NodeState.RANK_BLOCKED, f"Ichor Rank {rank_name(node.ichor_rank)} required."
+        missing = [p for p in node.prereq if p not in self.unlocked]
+        if missing:
+            return NodeState.PREREQ_BLOCKED, f"Requires: {missing[0]}"
+        return NodeState.AVAILABLE, None
+
+    def _update(self, ids: Iterable[str]) -> List[str]:
+        changed: List[str] = []
+        for nid in ids:
+            st, reason = self._eval(nid)
+            if self.states.get(nid) != st or self.reasons.get(nid) != reason:
+                self.states[nid] = st; self.reasons[nid] = reason
+                changed.append(nid)
+        return changed
+
+    def evaluate_all(self) -> List[str]:
+        idx = self.tree.index
+        return self._update(idx.order + idx.cyclic)
+
+    def set_unlocked(self, nid: str, value: bool) -> List[str]:
+        if nid not in self.tree.nodes: return []
+        if value: self.unlocked.add(nid)
+        else: self.unlocked.discard(nid)
+        return self._update([nid] + self.tree.index.dependents.get(nid, []))
+
+    def set_rank(self, rank: int) -> List[str]:
+        if rank == self.rank: return []
+        self.rank = rank
+        return self.evaluate_all()
+
+    def state(self, nid: str) -> Optional[NodeState]:
+        return self.states.get(nid)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+import weakref
+from typing import TYPE_CHECKING, Dict, Iterable, Set, Tuple
+
+if TYPE_CHECKING:
+    from .models import SkillTree
+
+def sum_costs(tree: "SkillTree", ids: Iterable[str]) -> int:
+    return sum(tree.nodes[nid].cost for nid in ids if nid in tree.nodes)
+
+# Running XP spent per tree and in total for one character. unlock/lock adjust it
+# in O(1); a tree's entry is re-summed only when the tree object is replaced
+# (catalog refresh), touched (in-place cost edits) or the unlocked set was
+# changed behind the ledger's back.
+class XpLedger:
+    def __init__(self):
+        self._spent: Dict[str, int] = {}
+        self._stamp: Dict[str, Tuple[weakref.ref, int, int]] = {}  # tid -> (tree, tree version, n unlocked)
+        self._total = 0
+
+    def _valid(self, tree: "SkillTree", ids: Set[str]) -> bool:
+        st = self._stamp.get(tree.id)
+        return st is not None and st[0]() is tree and st[1] == tree._version and st[2] == len(ids)
+
+    def _store(self, tree: "SkillTree", ids: Set[str], spent: int) -> None:
+        self._total += spent - self._spent.get(tree.id, 0)
+        self._spent[tree.id] = spent
+        self._stamp[tree.id] = (weakref.ref(tree), tree._version, len(ids))
+
+    def forget(self, tid: str) -> None:
+        self._drop(tid)
+
+    def _drop(self, tid: str) -> None:
+        self._total -= self._spent.pop(tid, 0)
+        self._stamp.pop(tid, None)
+
+    def invalidate(self) -> None:
+        self._spent.clear(); self._stamp.clear(); self._total = 0
+
+    def spent_for(self, tree: "SkillTree", ids: Set[str]) -> int:
+        if not self._valid(tree, ids):
+            self._store(tree, ids, sum_costs(tree, ids))
+        return self._spent[tree.id]
+
+    def total(self, unlocked: Dict[str, Set[str]], trees_by_id: Dict[str, "SkillTree"]) -> int:
+        for tid in [tid for tid in self._spent if tid not in unlocked or tid not in trees_by_id]:
+            self._drop(tid)
+        for tid, ids in unlocked.items():
+            t = trees_by_id.get(tid)
+            if t: self.spent_for(t, ids)
+        return self._total
+
+    # called after the node was added to / removed from `ids`
+    def on_unlock(self, tree: "SkillTree", ids: Set[str], node_id: str) -> None:
+        self._adjust(tree, ids, node_id, +1)
+
+    def on_lock(self, tree: "SkillTree", ids: Set[str], node_id: str) -> None:
+        self._adjust(tree, ids, node_id, -1)
+
+    def _adjust(self, tree: "SkillTree", ids: Set[str], node_id: str, sign: int) -> None:
+        st = self._stamp.get(tree.id)
+        if st is None or st[0]() is not tree or st[1] != tree._version or st[2] != len(ids) - sign:
+            self._drop(tree.id); return  # re-summed on next read
+        node = tree.nodes.get(node_id)
+        self._store(tree, ids, self._spent[tree.id] + (sign * node.cost if node else 0))
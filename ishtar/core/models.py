@@ -1,7 +1,16 @@
 
 from __future__ import annotations
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set, Tuple
+import json
+from pathlib import Path
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+from .topology import TreeIndex
+from .ledger import XpLedger, sum_costs
+
+if TYPE_CHECKING:
+    from .bitset import UnlockBits
+    from .planner import UnlockPlan
+    from .optimizer import BudgetPlan
 
 # ----- Ichor rank helpers -----
 ICHOR_RANKS = ["Bloodling", "Neophyte", "Scion", "Elder", "Ascendant", "Ancient Evil"]
@@ -20,30 +29,94 @@ def rank_name(index_or_name) -> str:
     i = rank_to_index(index_or_name)
     return ICHOR_RANKS[i]
 
+# ----- Lazy description text -----
+# A source is anything with text(key) -> str: a JSON tree file, a packed catalog.
+class LazyText:
+    __slots__ = ("source", "key")
+
+    def __init__(self, source, key):
+        self.source = source; self.key = key
+
+    def load(self) -> str:
+        return self.source.text(self.key)
+
+class JsonDescriptions:
+    # reparses the tree file on first use and keeps only the descriptions
+    def __init__(self, path):
+        self.path = path
+        self._texts: Optional[Dict[str, str]] = None
+
+    def text(self, node_id: str) -> str:
+        if self._texts is None:
+            try:
+                data = json.loads(Path(self.path).read_text(encoding="utf-8"))
+                self._texts = {n["id"]: n.get("description", "") for n in data.get("nodes", [])}
+            except (OSError, ValueError, KeyError):
+                self._texts = {}
+        return self._texts.get(node_id, "")
+
 @dataclass
 class SkillNode:
     id: str
     name: str
     cost: int
-    description: str = ""
+    description: str = ""  # may hold a LazyText until first read, see below
     prereq: List[str] = field(default_factory=list)  # 0 or 1 element
     ichor_rank: int = 0  # required ichor rank (index)
 
+    @property
+    def raw_description(self):
+        return self.__dict__["_description"]
+
+def _get_description(self: SkillNode) -> str:
+    d = self.__dict__["_description"]
+    if isinstance(d, LazyText):
+        d = self.__dict__["_description"] = d.load()
+    return d
+
+def _set_description(self: SkillNode, value) -> None:
+    self.__dict__["_description"] = value
+
+# installed after @dataclass so the generated __init__ still takes `description`
+SkillNode.description = property(_get_description, _set_description)  # type: ignore[assignment]
+
 @dataclass
 class SkillTree:
     id: str
     name: str
     description: str = ""
     nodes: Dict[str, SkillNode] = field(default_factory=dict)
+    _version: int = field(default=0, init=False, repr=False, compare=False)
+    _index: Optional[TreeIndex] = field(default=None, init=False, repr=False, compare=False)
+
+    # ---- Topology ----
+    @property
+    def index(self) -> TreeIndex:
+        idx = self._index
+        if idx is None or idx.version != self._version or idx.size != len(self.nodes):
+            idx = self._index = TreeIndex(self, self._version)
+        return idx
+
+    def path_to(self, node_id: str) -> List[str]:
+        # root-first prerequisite chain ending at node_id
+        return list(reversed(self.index.ancestors(node_id))) + [node_id]
+
+    def touch(self) -> None:
+        # call after mutating nodes/prereqs in place so cached structure is rebuilt
+        self._version += 1
 
     @staticmethod
-    def from_dict(data: dict) -> "SkillTree":
+    def from_dict(data: dict, source=None) -> "SkillTree":
+        # with a description source, node descriptions are read back from it on first use
+        def desc(n: dict):
+            d = n.get("description", "")
+            return LazyText(source, n["id"]) if source is not None and d else d
         nodes = {
             n["id"]: SkillNode(
                 id=n["id"],
                 name=n.get("name", n["id"]),
                 cost=int(n.get("cost", 0)),
-                description=n.get("description", ""),
+                description=desc(n),
                 prereq=list(n.get("prereq", [])),
                 ichor_rank=rank_to_index(n.get("ichor_rank", 0)),
             )
@@ -56,6 +129,10 @@ class SkillTree:
             nodes=nodes,
         )
 
+    def copy(self) -> "SkillTree":
+        nodes = {nid: replace(n, prereq=list(n.prereq), description=n.raw_description) for nid, n in self.nodes.items()}
+        return SkillTree(id=self.id, name=self.name, description=self.description, nodes=nodes)
+
     def to_dict(self) -> dict:
         return {
             "id": self.id,
@@ -79,6 +156,28 @@ class Character:
     unlocked: Dict[str, Set[str]] = field(default_factory=dict)  # tree_id -> set(node_id)
     image: Optional[str] = None
     ichor_rank: int = 0  # current character ichor rank (index)
+    _ledger: XpLedger = field(default_factory=XpLedger, init=False, repr=False, compare=False)
+    _rev: int = field(default=0, init=False, repr=False, compare=False)
+
+    # ---- Dirty tracking ----
+    # revision goes up on every change; field assignments count automatically, in-place
+    # edits of `trees`/`unlocked` outside unlock()/lock() must call mark_dirty()
+    _TRACKED = ("name", "xp_pool", "trees", "unlocked", "image", "ichor_rank")
+
+    def __setattr__(self, key, value):
+        if key in Character._TRACKED: self.__dict__["_rev"] = self.__dict__.get("_rev", 0) + 1
+        if key == "unlocked" and "_ledger" in self.__dict__: self._ledger.invalidate()  # sets replaced wholesale
+        object.__setattr__(self, key, value)
+
+    def __post_init__(self):
+        self.__dict__["_rev"] = 0  # a freshly built character starts clean, not at len(_TRACKED)
+
+    @property
+    def revision(self) -> int:
+        return self._rev
+
+    def mark_dirty(self) -> None:
+        self._rev += 1
 
     @staticmethod
     def from_dict(d: dict) -> "Character":
@@ -95,7 +194,7 @@ class Character:
         return {
             "name": self.name,
             "xp_pool": self.xp_pool,
-            "trees": self.trees,
+            "trees": list(self.trees),
             "unlocked": {k: sorted(list(v)) for k, v in self.unlocked.items()},
             "image": self.image,
             "ichor_rank": rank_name(self.ichor_rank),
@@ -103,17 +202,18 @@ class Character:
 
     # ---- XP helpers ----
     def xp_spent_for_tree(self, tree: "SkillTree") -> int:
-        ids = self.unlocked.get(tree.id, set())
-        return sum(tree.nodes[nid].cost for nid in ids if nid in tree.nodes)
+        ids = self.unlocked.get(tree.id)
+        if not ids: return 0
+        return self._ledger.spent_for(tree, ids)
 
     def xp_spent_total(self, trees_by_id: Dict[str, "SkillTree"]) -> int:
-        total = 0
-        for tid, ids in self.unlocked.items():
-            t = trees_by_id.get(tid)
-            if not t:
-                continue
-            total += sum(t.nodes[n].cost for n in ids if n in t.nodes)
-        return total
+        return self._ledger.total(self.unlocked, trees_by_id)
+
+    def verify_xp_ledger(self, trees_by_id: Dict[str, "SkillTree"]) -> bool:
+        # consistency check of the running ledger against a full re-sum
+        full = {tid: sum_costs(trees_by_id[tid], ids) for tid, ids in self.unlocked.items() if tid in trees_by_id}
+        if self.xp_spent_total(trees_by_id) != sum(full.values()): return False
+        return all(self.xp_spent_for_tree(trees_by_id[tid]) == v for tid, v in full.items())
 
     # ---- Unlock helpers ----
     def can_unlock(self, tree: "SkillTree", node_id: str, trees_by_id: Dict[str, "SkillTree"]) -> Tuple[bool, str]:
@@ -127,7 +227,7 @@ class Character:
         if node.ichor_rank > self.ichor_rank:
             return False, f"Ichor Rank {rank_name(node.ichor_rank)} required."
 
-        # Prerequisite gate
+        # Prerequisite gate (every prereq, not just the first one the index follows)
         have = self.unlocked.get(tree.id, set())
         missing = [p for p in node.prereq if p not in have]
         if missing:
@@ -150,8 +250,50 @@ class Character:
             return f"Requires: {missing[0]}"
         return None
 
+    # ---- Path planning ----
+    def plan_unlock(self, tree: "SkillTree", target: str) -> "UnlockPlan":
+        from .planner import plan_unlock
+        return plan_unlock(tree, self.unlocked.get(tree.id, set()), target)
+
+    def apply_plan(self, tree: "SkillTree", plan: "UnlockPlan") -> Tuple[bool, str]:
+        # all-or-nothing: nothing is unlocked unless the whole chain is allowed
+        if plan.tree_id != tree.id: return False, "Plan belongs to another tree."
+        if plan.blocked: return False, plan.blocked
+        reason = plan.rank_reason(self.ichor_rank)
+        if reason: return False, reason
+        have = set(self.unlocked.get(tree.id, set()))
+        for nid in plan.nodes:  # dry run in plan order; a stale or partial plan is refused whole
+            node = tree.nodes.get(nid)
+            if node is None: return False, f"Node '{nid}' not found."
+            missing = [p for p in node.prereq if p not in have]
+            if missing: return False, f"Requires: {missing[0]}"
+            have.add(nid)
+        for nid in plan.nodes:
+            self.unlock(tree, nid)
+        return True, "OK"
+
+    def optimize_xp(self, trees_by_id: Dict[str, "SkillTree"], weight=None, budget: Optional[int] = None) -> "BudgetPlan":
+        # best prerequisite-respecting purchase across this character's trees for the remaining XP
+        from .optimizer import optimize_budget
+        if budget is None: budget = self.xp_pool - self.xp_spent_total(trees_by_id)
+        trees = [trees_by_id[tid] for tid in self.trees if tid in trees_by_id]
+        return optimize_budget(trees, self.unlocked, budget, self.ichor_rank, weight)
+
+    # ---- Bitset views ----
+    def unlocked_bits(self, tree: "SkillTree") -> "UnlockBits":
+        from .bitset import UnlockBits
+        return UnlockBits.from_ids(tree.index, self.unlocked.get(tree.id, ()))
+
+    def set_unlocked_bits(self, tree: "SkillTree", bits: "UnlockBits") -> None:
+        self.unlocked[tree.id] = bits.to_set()
+        self._ledger.forget(tree.id); self.mark_dirty()
+
     def unlock(self, tree: "SkillTree", node_id: str) -> None:
-        self.unlocked.setdefault(tree.id, set()).add(node_id)
+        have = self.unlocked.setdefault(tree.id, set())
+        if node_id in have: return
+        have.add(node_id); self._ledger.on_unlock(tree, have, node_id); self.mark_dirty()
 
     def lock(self, tree: "SkillTree", node_id: str) -> None:
-        self.unlocked.setdefault(tree.id, set()).discard(node_id)
+        have = self.unlocked.setdefault(tree.id, set())
+        if node_id not in have: return
+        have.discard(node_id); self._ledger.on_lock(tree, have, node_id); self.mark_dirty()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from operator import gt
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from .models import SkillNode, SkillTree
+
+Weight = Callable[[SkillTree, SkillNode], float]
+
+@dataclass
+class BudgetPlan:
+    budget: int
+    nodes: Dict[str, List[str]] = field(default_factory=dict)  # tree id -> ids in unlock order
+    xp: int = 0
+    weight: float = 0.0
+
+    def count(self) -> int:
+        return sum(len(v) for v in self.nodes.values())
+
+def _sequence(trees: List[SkillTree], unlocked: Dict[str, Set[str]], rank: int, weight: Weight,
+              banned: Dict[str, Set[str]]):
+    # concatenated preorder of every unlockable node; an item's subtree is the
+    # contiguous run seq[i:i+size[i]], so "skip" jumps straight past it
+    seq: List[Tuple[str, str, int, float]] = []  # (tree id, node id, cost, weight)
+    sizes: List[int] = []
+    for t in trees:
+        idx = t.index; have = unlocked.get(t.id, set()); out = banned.get(t.id, set())
+        # an owned node under a locked parent still opens its children: give it its own run
+        def hoisted(nid: str) -> bool:
+            p = idx.parent[nid]
+            return nid in have and p is not None and p not in have
+        starts = idx.roots + sorted(nid for nid in have if nid in idx.parent and hoisted(nid))
+        seen: Set[str] = set()
+        for s in starts:
+            stack: List[Tuple[str, int]] = [(s, -1)]
+            while stack:
+                nid, pos = stack.pop()
+                if pos >= 0:
+                    sizes[pos] = len(seq) - pos; continue
+                if nid in seen: continue
+                n = t.nodes[nid]
+                if nid in have:
+                    seq.append((t.id, nid, 0, 0.0))  # already bought: free, only opens its children
+                elif n.ichor_rank <= rank and nid not in out:
+                    seq.append((t.id, nid, n.cost, float(weight(t, n))))
+                else:
+                    continue
+                seen.add(nid); sizes.append(1)
+                stack.append((nid, len(seq) - 1))
+                for c in reversed(idx.children[nid]):
+                    if not hoisted(c): stack.append((c, -1))
+    return seq, sizes
+
+def _knapsack(seq, sizes, B: int) -> Tuple[float, List[int]]:
+    # best total weight within budget B and the items taking it (indices into seq)
+    n = len(seq)
+    if not n: return 0.0, []
+    refs = [0] * (n + 1)
+    for i in range(n):
+        refs[i + 1] += 1; refs[i + sizes[i]] += 1
+    rows: Dict[int, List[float]] = {n: [0.0] * (B + 1)}
+    take: List[bytes] = [b""] * n
+    neg = float("-inf")
+    for i in range(n - 1, -1, -1):
+        _, _, c, w = seq[i]
+        nxt = rows[i + 1]; skip = rows[i + sizes[i]]
+        if c > B:
+            row = list(skip); dec = bytes(B + 1)
+        else:
+            shifted = [neg] * c + [x + w for x in nxt[:B + 1 - c]]
+            dec = bytes(map(gt, shifted, skip))
+            row = list(map(max, shifted, skip))
+        take[i] = dec; rows[i] = row
+        for j in (i + 1, i + sizes[i]):
+            refs[j] -= 1
+            if refs[j] == 0: del rows[j]
+    best = rows[0][B]; picked: List[int] = []
+    i = 0; b = B
+    while i < n:
+        if take[i][b]:
+            picked.append(i); b -= seq[i][2]; i += 1
+        else:
+            i += sizes[i]
+    return best, picked
+
+def _in_order(by_id: Dict[str, SkillTree], new: List[Tuple[str, str]], unlocked: Dict[str, Set[str]]):
+    # unlock the picked nodes as their prerequisites come in (owned or unlocked earlier);
+    # returns that legal order and the nodes left stuck (missing or cyclic prerequisites)
+    have = {tid: set(unlocked.get(tid, ())) for tid in by_id}
+    order: List[Tuple[str, str]] = []; left = list(new)
+    while True:
+        ready = [(tid, nid) for tid, nid in left if all(p in have[tid] for p in by_id[tid].nodes[nid].prereq)]
+        if not ready: return order, left
+        for tid, nid in ready: have[tid].add(nid)
+        order += ready; left = [x for x in left if x[1] not in have[x[0]]]
+
+# Tree knapsack over all trees at once: pick the prerequisite-closed set of nodes
+# with maximum total weight whose cost fits the budget. O(n * budget) time,
+# rows are freed as soon as no later item can jump to them. The DP is exact over
+# the first-prerequisite forest; a picked node is kept only if all its prerequisites
+# are owned or picked and unlockable before it, otherwise it is banned and the DP
+# re-runs so the freed budget goes elsewhere (never a node with a prereq missing).
+def optimize_budget(trees: List[SkillTree], unlocked: Dict[str, Set[str]], budget: int, rank: int,
+                    weight: Optional[Weight] = None) -> BudgetPlan:
+    plan = BudgetPlan(budget=max(0, budget))
+    weight = weight or (lambda t, n: 1.0)
+    by_id = {t.id: t for t in trees}; banned: Dict[str, Set[str]] = {}
+    while True:
+        seq, sizes = _sequence(trees, unlocked, rank, weight, banned)
+        best, picked = _knapsack(seq, sizes, plan.budget)
+        new = [(seq[i][0], seq[i][1]) for i in picked if seq[i][1] not in unlocked.get(seq[i][0], ())]
+        order, bad = _in_order(by_id, new, unlocked)
+        if not bad: break
+        for tid, nid in bad: banned.setdefault(tid, set()).add(nid)
+    plan.weight = best
+    for tid, nid in order:
+        plan.nodes.setdefault(tid, []).append(nid); plan.xp += by_id[tid].nodes[nid].cost
+    return plan
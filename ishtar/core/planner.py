@@ -0,0 +1,45 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from .models import SkillTree, rank_name
+
+@dataclass
+class UnlockPlan:
+    tree_id: str
+    target: str
+    nodes: List[str] = field(default_factory=list)  # missing prerequisites (all of them, transitively) + target, unlock order
+    xp: int = 0
+    max_rank: int = 0
+    blocked: Optional[str] = None  # set when the chain itself cannot be completed
+
+    def rank_reason(self, char_rank: int) -> Optional[str]:
+        if self.max_rank > char_rank:
+            return f"Ichor Rank {rank_name(self.max_rank)} required."
+        return None
+
+def plan_unlock(tree: SkillTree, have: Set[str], target: str) -> UnlockPlan:
+    plan = UnlockPlan(tree.id, target)
+    if target not in tree.nodes:
+        plan.blocked = "Node not found."; return plan
+    if target in tree.index.cyclic:
+        plan.blocked = "Prerequisite chain contains a cycle."; return plan
+    # depth-first over every prereq, emitting a node once all it needs is emitted;
+    # state 1 marks the nodes on the current path, so meeting one again is a cycle
+    state: Dict[str, int] = {}
+    stack = [(target, False)]
+    while stack:
+        nid, done = stack.pop()
+        if done:
+            state[nid] = 2; plan.nodes.append(nid); continue
+        if nid in have or state.get(nid) == 2: continue
+        if state.get(nid) == 1:
+            plan.nodes = []; plan.blocked = "Prerequisite chain contains a cycle."; return plan
+        n = tree.nodes.get(nid)
+        if n is None:
+            plan.nodes = []; plan.blocked = f"Requires: {nid}"; return plan
+        state[nid] = 1; stack.append((nid, True))
+        for p in reversed(n.prereq): stack.append((p, False))
+    for nid in plan.nodes:
+        n = tree.nodes[nid]
+        plan.xp += n.cost; plan.max_rank = max(plan.max_rank, n.ichor_rank)
+    return plan
@@ -0,0 +1,120 @@
+from __future__ import annotations
+import hashlib
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from .models import SkillTree
+
+# Compiled parent/child structure of a SkillTree. Built iteratively in O(n);
+# SkillTree.index caches one and rebuilds it lazily after SkillTree.touch().
+class TreeIndex:
+    def __init__(self, tree: "SkillTree", version: int = 0):
+        self.version = version
+        self.size = len(tree.nodes)
+        nodes = tree.nodes
+
+        # raw parent (first prereq, may point at a missing node) and sorted child lists
+        self.parent: Dict[str, Optional[str]] = {}
+        self.children: Dict[str, List[str]] = {nid: [] for nid in nodes}
+        orphans: List[str] = []
+        for nid, n in nodes.items():
+            p = n.prereq[0] if n.prereq else None
+            self.parent[nid] = p
+            if p is None: continue
+            if p in self.children: self.children[p].append(nid)
+            else: orphans.append(nid)
+        for v in self.children.values(): v.sort()
+        self.roots: List[str] = sorted(nid for nid, p in self.parent.items() if p is None)
+        self.orphans: List[str] = sorted(orphans)  # prereq names a node that does not exist
+
+        # preorder walk (parents before children) with Euler enter/exit numbers;
+        # subtree(n) == order[tin[n]:tout[n]+1]
+        self.order: List[str] = []
+        self.depth: Dict[str, int] = {}
+        self.tin: Dict[str, int] = {}
+        self.tout: Dict[str, int] = {}
+        for r in self.roots + self.orphans:
+            stack = [(r, 0)]
+            while stack:
+                nid, d = stack.pop()
+                if d < 0:
+                    self.tout[nid] = len(self.order) - 1; continue
+                self.tin[nid] = len(self.order); self.depth[nid] = d
+                self.order.append(nid)
+                stack.append((nid, -1))
+                for c in reversed(self.children[nid]):
+                    stack.append((c, d + 1))
+        # whatever the walk could not reach hangs off a prerequisite cycle
+        self.cyclic: List[str] = sorted(nid for nid in nodes if nid not in self.tin)
+        self._slot_ids: Optional[List[str]] = None
+        self._slot_of: Optional[Dict[str, int]] = None
+        self._structure_key: Optional[bytes] = None
+        self._slots_key: Optional[bytes] = None
+        self._prereqs: Dict[str, List[str]] = {nid: list(n.prereq) for nid, n in nodes.items()}
+        self._dependents: Optional[Dict[str, List[str]]] = None
+
+    # ---- Every prerequisite (parent/children above follow only the first one) ----
+    def prereqs(self, nid: str) -> List[str]:
+        return self._prereqs.get(nid, [])
+
+    @property
+    def dependents(self) -> Dict[str, List[str]]:
+        # prereq id -> sorted nodes naming it anywhere in their prereq list
+        if self._dependents is None:
+            deps: Dict[str, List[str]] = {}
+            for nid, pr in self._prereqs.items():
+                for p in dict.fromkeys(pr): deps.setdefault(p, []).append(nid)
+            for v in deps.values(): v.sort()
+            self._dependents = deps
+        return self._dependents
+
+    # ---- Dense slots (sorted ids, stable across reloads of the same tree) ----
+    @property
+    def slot_ids(self) -> List[str]:
+        if self._slot_ids is None:
+            self._slot_ids = sorted(self.children)
+            self._slot_of = {nid: i for i, nid in enumerate(self._slot_ids)}
+        return self._slot_ids
+
+    @property
+    def slot_of(self) -> Dict[str, int]:
+        if self._slot_of is None: self.slot_ids
+        return self._slot_of
+
+    # ---- Structure hash (node ids + parent links; names, costs, ranks don't count) ----
+    @property
+    def structure_key(self) -> bytes:
+        if self._structure_key is None:
+            h = hashlib.blake2b(digest_size=16)
+            for nid in self.slot_ids:
+                p = self.parent[nid]
+                h.update(nid.encode("utf-8")); h.update(b"\x1f" if p is None else b"\x1e" + p.encode("utf-8")); h.update(b"\x00")
+            self._structure_key = h.digest()
+        return self._structure_key
+
+    # ---- Slot hash (node ids only; decides whether slot numbers carry over) ----
+    @property
+    def slots_key(self) -> bytes:
+        if self._slots_key is None:
+            h = hashlib.blake2b(digest_size=8)
+            for nid in self.slot_ids: h.update(nid.encode("utf-8")); h.update(b"\x00")
+            self._slots_key = h.digest()
+        return self._slots_key
+
+    def is_ancestor(self, a: str, b: str) -> bool:
+        ta = self.tin.get(a); tb = self.tin.get(b)
+        if ta is None or tb is None or a == b: return False
+        return ta <= tb <= self.tout[a]
+
+    def subtree(self, nid: str) -> List[str]:
+        t = self.tin.get(nid)
+        if t is None: return [nid] if nid in self.children else []
+        return self.order[t:self.tout[nid] + 1]
+
+    def ancestors(self, nid: str) -> List[str]:
+        # nearest first; stops at a root, a missing prereq or a cycle
+        out: List[str] = []; seen = {nid}
+        p = self.parent.get(nid)
+        while p is not None and p in self.parent and p not in seen:
+            out.append(p); seen.add(p); p = self.parent[p]
+        return out
@@ -1,35 +1,169 @@
-
 from __future__ import annotations
-from typing import List, Tuple
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 from .models import SkillTree, ICHOR_RANKS
 
-def validate_tree(tree: SkillTree) -> Tuple[bool, List[str]]:
-    errs: List[str] = []
-    ids = set(tree.nodes.keys())
-    if not tree.id.strip(): errs.append("Tree ID is required.")
-    if not tree.name.strip(): errs.append("Tree name is required.")
+@dataclass(frozen=True)
+class Diagnostic:
+    code: str
+    message: str
+    node_id: Optional[str] = None
+    related: Tuple[str, ...] = ()
+
+def _find_cycles(tree: SkillTree) -> Tuple[List[List[str]], List[str]]:
+    # every node has at most one parent, so each cyclic component is a single loop
+    # plus chains hanging below it; walk parent links once per node (O(n), no recursion)
+    idx = tree.index
+    pending = set(idx.cyclic)
+    state: Dict[str, int] = {}
+    cycles: List[List[str]] = []
+    for start in idx.cyclic:
+        if start in state: continue
+        path: List[str] = []; u: Optional[str] = start
+        while u is not None and u in pending and u not in state:
+            state[u] = 1; path.append(u); u = idx.parent[u]
+        if u is not None and state.get(u) == 1:
+            cyc = path[path.index(u):]
+            k = cyc.index(min(cyc)); cycles.append(cyc[k:] + cyc[:k])
+        for v in path: state[v] = 2
+    on_cycle = {nid for c in cycles for nid in c}
+    below = [nid for nid in idx.cyclic if nid not in on_cycle]
+    return sorted(cycles), below
+
+def diagnose_tree_meta(tree: SkillTree) -> List[Diagnostic]:
+    out: List[Diagnostic] = []
+    if not tree.id.strip(): out.append(Diagnostic("tree_id_missing", "Tree ID is required."))
+    if not tree.name.strip(): out.append(Diagnostic("tree_name_missing", "Tree name is required."))
+    return out
+
+def diagnose_tree(tree: SkillTree) -> List[Diagnostic]:
+    out = diagnose_tree_meta(tree)
+    ids = tree.nodes
     for n in tree.nodes.values():
         if len(n.prereq) > 1:
-            errs.append(f"Node '{n.id}' has more than one prerequisite.")
+            out.append(Diagnostic("multiple_prereqs", f"Node '{n.id}' has more than one prerequisite.", n.id, tuple(n.prereq)))
         for p in n.prereq:
-            if p not in ids: errs.append(f"Node '{n.id}' has missing prerequisite '{p}'.")
+            if p not in ids: out.append(Diagnostic("missing_prereq", f"Node '{n.id}' has missing prerequisite '{p}'.", n.id, (p,)))
         if n.prereq and n.prereq[0] == n.id:
-            errs.append(f"Node '{n.id}' cannot depend on itself.")
+            out.append(Diagnostic("self_prereq", f"Node '{n.id}' cannot depend on itself.", n.id))
         if not (0 <= n.ichor_rank < len(ICHOR_RANKS)):
-            errs.append(f"Node '{n.id}' has invalid ichor rank.")
-    # cycle check
-    state = {}; path: List[str] = []
-    graph = {nid: node.prereq[:1] for nid, node in tree.nodes.items()}
-    def dfs(u: str) -> bool:
-        state[u] = 1
-        for v in graph.get(u, []):
-            s = state.get(v, 0)
-            if s == 0:
-                if dfs(v): path.append(v); return True
-            elif s == 1:
-                path.append(v); return True
-        state[u] = 2; return False
-    for u in graph:
-        if state.get(u,0)==0 and dfs(u):
-            errs.append("Cycle detected."); break
+            out.append(Diagnostic("invalid_rank", f"Node '{n.id}' has invalid ichor rank.", n.id))
+    cycles, below = _find_cycles(tree)
+    for cyc in cycles:
+        out.append(Diagnostic("cycle", "Cycle detected: " + " -> ".join(cyc + cyc[:1]) + ".", cyc[0], tuple(cyc)))
+    for nid in below:
+        p = tree.index.parent[nid]
+        out.append(Diagnostic("below_cycle", f"Node '{nid}' depends on a prerequisite cycle.", nid, (p,) if p else ()))
+    return out
+
+def validate_tree(tree: SkillTree) -> Tuple[bool, List[str]]:
+    errs = [d.message for d in diagnose_tree(tree)]
     return (len(errs)==0), errs
+
+# ---- Incremental validation ----
+NodeSpec = Tuple[str, Optional[Tuple[str, ...]], int]  # (id, prereqs or None if removed, ichor rank)
+
+def node_specs(tree: SkillTree, ids=None) -> List[NodeSpec]:
+    nodes = tree.nodes
+    if ids is None: ids = nodes.keys()
+    return [(nid, tuple(nodes[nid].prereq), nodes[nid].ichor_rank) if nid in nodes else (nid, None, 0) for nid in ids]
+
+# Node-level diagnostics kept up to date from edit deltas. It owns a plain mirror
+# of the tree structure, so apply() may run off the GUI thread while the editor
+# keeps mutating the real SkillTree. An edit re-checks the touched nodes, their
+# direct dependents and, when a prerequisite link moved, the subtree below it.
+class IncrementalValidator:
+    def __init__(self):
+        self._prereqs: Dict[str, Tuple[str, ...]] = {}
+        self._rank: Dict[str, int] = {}
+        self._kids: Dict[str, set] = {}  # first-prereq id (may be missing) -> dependents
+        self._deps: Dict[str, set] = {}  # any prereq id (may be missing) -> nodes naming it
+        self._local: Dict[str, List[Diagnostic]] = {}
+        self._cycle_of: Dict[str, frozenset] = {}
+        self._cycles: Dict[frozenset, Diagnostic] = {}
+        self._below: Dict[str, Diagnostic] = {}
+
+    def reset(self, specs: List[NodeSpec]) -> None:
+        self.__init__()
+        self.apply(specs)
+
+    def _parent(self, nid: str) -> Optional[str]:
+        pr = self._prereqs.get(nid)
+        return pr[0] if pr else None
+
+    def _check_local(self, nid: str) -> None:
+        pr = self._prereqs.get(nid)
+        if pr is None: self._local.pop(nid, None); return
+        out: List[Diagnostic] = []
+        if len(pr) > 1:
+            out.append(Diagnostic("multiple_prereqs", f"Node '{nid}' has more than one prerequisite.", nid, pr))
+        for p in pr:
+            if p not in self._prereqs: out.append(Diagnostic("missing_prereq", f"Node '{nid}' has missing prerequisite '{p}'.", nid, (p,)))
+        if pr and pr[0] == nid:
+            out.append(Diagnostic("self_prereq", f"Node '{nid}' cannot depend on itself.", nid))
+        if not (0 <= self._rank[nid] < len(ICHOR_RANKS)):
+            out.append(Diagnostic("invalid_rank", f"Node '{nid}' has invalid ichor rank.", nid))
+        if out: self._local[nid] = out
+        else: self._local.pop(nid, None)
+
+    def _subtree(self, nid: str) -> List[str]:
+        seen = {nid}; out = [nid]; stack = [nid]
+        while stack:
+            for c in self._kids.get(stack.pop(), ()):
+                if c not in seen: seen.add(c); out.append(c); stack.append(c)
+        return out
+
+    def _check_structure(self, nid: str) -> None:
+        sub = self._subtree(nid)
+        for u in sub:
+            self._below.pop(u, None)
+            key = self._cycle_of.get(u)
+            if key is not None:
+                self._cycles.pop(key, None)
+                for v in key: self._cycle_of.pop(v, None)
+        if nid not in self._prereqs: return
+        # walk up: reaching a root or a missing prereq means the whole subtree is acyclic
+        path: List[str] = []; pos: Dict[str, int] = {}; u: Optional[str] = nid
+        while u is not None and u in self._prereqs and u not in pos:
+            if u in self._cycle_of or u in self._below: break
+            pos[u] = len(path); path.append(u); u = self._parent(u)
+        if u is None or u not in self._prereqs: return
+        if u in pos:
+            cyc = path[pos[u]:]
+            k = cyc.index(min(cyc)); cyc = cyc[k:] + cyc[:k]
+            key = frozenset(cyc)
+            self._cycles[key] = Diagnostic("cycle", "Cycle detected: " + " -> ".join(cyc + cyc[:1]) + ".", cyc[0], tuple(cyc))
+            for v in cyc: self._cycle_of[v] = key
+        for v in sub:
+            if v in self._prereqs and v not in self._cycle_of:
+                p = self._parent(v)
+                self._below[v] = Diagnostic("below_cycle", f"Node '{v}' depends on a prerequisite cycle.", v, (p,) if p else ())
+
+    def apply(self, changes: List[NodeSpec]) -> List[str]:
+        local: set = set(); moved: List[str] = []
+        for nid, pr, rank in changes:
+            old = self._prereqs.get(nid)
+            old_parent = old[0] if old else None
+            if old_parent is not None: self._kids.get(old_parent, set()).discard(nid)
+            for p in old or (): self._deps.get(p, set()).discard(nid)
+            existed = nid in self._prereqs
+            if pr is None:
+                self._prereqs.pop(nid, None); self._rank.pop(nid, None)
+            else:
+                self._prereqs[nid] = pr; self._rank[nid] = rank
+                if pr: self._kids.setdefault(pr[0], set()).add(nid)
+                for p in pr: self._deps.setdefault(p, set()).add(nid)
+            local.add(nid)
+            if existed != (pr is not None):
+                local.update(self._deps.get(nid, ()))  # dependents' missing-prereq status flips
+            if old_parent != (pr[0] if pr else None) or existed != (pr is not None):
+                moved.append(nid)
+        for nid in local: self._check_local(nid)
+        for nid in moved: self._check_structure(nid)
+        return sorted(local | set(moved))
+
+    def diagnostics(self) -> List[Diagnostic]:
+        out = [d for nid in sorted(self._local) for d in self._local[nid]]
+        out += [self._cycles[k] for k in sorted(self._cycles, key=lambda k: self._cycles[k].message)]
+        out += [self._below[nid] for nid in sorted(self._below)]
+        return out
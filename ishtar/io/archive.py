@@ -0,0 +1,147 @@
+from __future__ import annotations
+import hashlib, json, os, tempfile, zipfile
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .storage import Storage
+
+# Campaign archive: every character, its portrait and the tree files its characters
+# use, in one zip. Entries are copied in CHUNK-sized pieces in both directions and
+# manifest.json (written last) lists each entry's size and sha256.
+#
+#   characters/<name>.json, characters/<image>, trees/<file>.json, manifest.json
+MANIFEST = "manifest.json"
+ARCHIVE_FORMAT = "ishtar-campaign"
+ARCHIVE_VERSION = 1
+CHUNK = 1 << 20
+
+# progress(bytes done, bytes total, entry name); returning False cancels
+Progress = Callable[[int, int, str], bool]
+
+@dataclass
+class ArchiveEntry:
+    path: str
+    size: int
+    sha256: str
+
+@dataclass
+class ArchiveReport:
+    written: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)  # import: identical file already present
+    errors: List[str] = field(default_factory=list)
+    cancelled: bool = False
+
+    @property
+    def characters(self) -> List[str]:
+        return [PurePosixPath(p).stem for p in self.written + self.skipped
+                if p.startswith("characters/") and p.endswith(".json")]
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for b in iter(lambda: f.read(CHUNK), b""): h.update(b)
+    return h.hexdigest()
+
+def _export_sources(storage: "Storage") -> List[Tuple[str, Optional[Path], Optional[bytes]]]:
+    # (arcname, file to stream or None, in-memory bytes for characters without a file)
+    out: List[Tuple[str, Optional[Path], Optional[bytes]]] = []
+    trees: Dict[str, Path] = {}
+    storage.load_trees()
+    for name in storage.list_characters():
+        ch = storage.load_character(name)
+        if not ch: continue
+        src = storage.character_file(name)
+        if src: out.append((f"characters/{src.name}", src, None))
+        else: out.append((f"characters/{name}.json", None, json.dumps(ch.to_dict(), indent=2, ensure_ascii=False).encode("utf-8")))
+        img = storage.character_image_path(ch)
+        if img: out.append((f"characters/{img.name}", img, None))
+        for tid in ch.trees:
+            p = storage.catalog.path_of(tid)
+            if p: trees[tid] = p
+    out += [(f"trees/{p.name}", p, None) for p in sorted(set(trees.values()))]
+    seen = set()
+    return [e for e in out if not (e[0] in seen or seen.add(e[0]))]
+
+def export_campaign(storage: "Storage", out_zip: Path, progress: Optional[Progress] = None) -> ArchiveReport:
+    rep = ArchiveReport()
+    sources = _export_sources(storage)
+    total = sum(p.stat().st_size if p else len(b) for _, p, b in sources); done = 0
+    out_zip = Path(out_zip)
+    fd, tmp = tempfile.mkstemp(prefix=out_zip.name + ".", suffix=".tmp", dir=str(out_zip.parent))
+    os.close(fd)
+    manifest: List[ArchiveEntry] = []
+    try:
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as z:
+            for arc, path, data in sources:
+                if progress and not progress(done, total, arc):
+                    rep.cancelled = True; break
+                h = hashlib.sha256(); size = 0
+                if path:
+                    info = zipfile.ZipInfo.from_file(path, arc); info.compress_type = zipfile.ZIP_DEFLATED
+                    with open(path, "rb") as src, z.open(info, "w") as dst:
+                        for b in iter(lambda: src.read(CHUNK), b""):
+                            h.update(b); dst.write(b); size += len(b); done += len(b)
+                else:
+                    h.update(data); z.writestr(arc, data); size = len(data); done += size
+                manifest.append(ArchiveEntry(arc, size, h.hexdigest())); rep.written.append(arc)
+            if not rep.cancelled:
+                z.writestr(MANIFEST, json.dumps({"format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION,
+                                                 "files": [e.__dict__ for e in manifest]}, indent=2))
+        if rep.cancelled: os.unlink(tmp); rep.written.clear()
+        else: os.replace(tmp, out_zip)
+    except BaseException:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+    if progress and not rep.cancelled: progress(total, total, "")
+    return rep
+
+def read_manifest(z: zipfile.ZipFile) -> List[ArchiveEntry]:
+    d = json.loads(z.read(MANIFEST).decode("utf-8"))
+    if d.get("format") != ARCHIVE_FORMAT: raise ValueError("Not a campaign archive.")
+    if d.get("version", 0) > ARCHIVE_VERSION: raise ValueError(f"Unsupported archive version {d.get('version')}.")
+    return [ArchiveEntry(e["path"], int(e["size"]), e["sha256"]) for e in d.get("files", [])]
+
+def _target(storage: "Storage", arc: str) -> Optional[Path]:
+    # "<characters|trees>/<plain file name>" only: no backslashes, drives, colons, dot
+    # segments or absolute roots, and the result must still resolve inside its directory
+    if "\\" in arc or ":" in arc or arc.startswith("/"): return None
+    p = PurePosixPath(arc)
+    if len(p.parts) != 2 or p.name in ("", ".", "..") or ".." in p.parts: return None
+    root = {"characters": storage.chars_dir, "trees": storage.trees_dir}.get(p.parts[0])
+    if root is None: return None
+    dest = (root / p.name).resolve(); base = root.resolve()
+    return dest if dest.parent == base else None
+
+def import_campaign(storage: "Storage", zip_path: Path, progress: Optional[Progress] = None) -> ArchiveReport:
+    rep = ArchiveReport()
+    with zipfile.ZipFile(zip_path, "r") as z:
+        entries = read_manifest(z)
+        total = sum(e.size for e in entries); done = 0
+        for e in entries:
+            if progress and not progress(done, total, e.path):
+                rep.cancelled = True; break
+            dest = _target(storage, e.path)
+            if dest is None:
+                rep.errors.append(f"{e.path}: unexpected entry"); done += e.size; continue
+            if dest.exists() and dest.stat().st_size == e.size and _sha256_file(dest) == e.sha256:
+                rep.skipped.append(e.path); done += e.size; continue
+            fd, tmp = tempfile.mkstemp(prefix=dest.name + ".", suffix=".tmp", dir=str(dest.parent))
+            try:
+                h = hashlib.sha256()
+                with os.fdopen(fd, "wb") as dst, z.open(e.path) as src:
+                    for b in iter(lambda: src.read(CHUNK), b""):
+                        h.update(b); dst.write(b); done += len(b)
+                if h.hexdigest() != e.sha256: raise ValueError("checksum mismatch")
+                os.replace(tmp, dest)
+            except Exception as ex:
+                try: os.unlink(tmp)
+                except OSError: pass
+                rep.errors.append(f"{e.path}: {ex}"); continue
+            if e.path.startswith("characters/") and dest.suffix == ".json":
+                storage.register_character_file(dest)
+            rep.written.append(e.path)
+    if progress and not rep.cancelled: progress(total, total, "")
+    return rep
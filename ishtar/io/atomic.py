@@ -0,0 +1,18 @@
+from __future__ import annotations
+import os, tempfile
+from pathlib import Path
+
+def atomic_write_text(path: Path, text: str) -> int:
+    # write to a temp file next to `path`, flush it to disk, then swap it in;
+    # readers and crashes only ever see the old or the new complete file
+    path = Path(path); data = text.encode("utf-8")
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data); f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+    return len(data)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+import json, threading, time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from ..core.models import Character
+from .atomic import atomic_write_text
+from .storage import Storage
+
+@dataclass
+class AutosaveStats:
+    saves: int = 0
+    skipped: int = 0        # ticks with nothing new to write (or a write still running)
+    failures: int = 0
+    last_latency_ms: float = 0.0  # serialize + write, measured on the worker
+    last_bytes: int = 0
+    last_error: Optional[str] = None
+
+# Crash-recovery drafts. tick() runs on the GUI thread and only takes a to_dict()
+# snapshot when the character's revision moved; json encoding and the atomic
+# write happen on a single worker thread, so drafts are written in order.
+class Autosaver:
+    def __init__(self, storage: Storage):
+        self.storage = storage
+        self.stats = AutosaveStats()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+        # character name -> (object, revision) on disk; revisions alone collide once a
+        # reloaded character counts up from 0 again, so the object is kept alongside
+        self._written: Dict[str, Tuple[Character, int]] = {}
+        self._pending: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._error: Optional[str] = None
+
+    def tick(self, ch: Optional[Character]) -> bool:
+        if ch is None: return False
+        rev = ch.revision; last = self._written.get(ch.name)
+        if (last is not None and last[0] is ch and last[1] == rev) or (self._pending is not None and not self._pending.done()):
+            self.stats.skipped += 1; return False
+        self._written[ch.name] = (ch, rev)
+        self._pending = self._pool.submit(self._write, ch.name, ch.to_dict())
+        return True
+
+    def _write(self, name: str, data: dict) -> None:
+        t0 = time.perf_counter()
+        try:
+            n = atomic_write_text(self.storage.autosave_path(name), json.dumps(data, ensure_ascii=False))
+        except Exception as e:
+            with self._lock:
+                self.stats.failures += 1; self.stats.last_error = self._error = f"{type(e).__name__}: {e}"
+            self._written.pop(name, None)  # retry on the next tick
+            return
+        with self._lock:
+            self.stats.saves += 1; self.stats.last_bytes = n
+            self.stats.last_latency_ms = (time.perf_counter() - t0) * 1000.0
+
+    def take_error(self) -> Optional[str]:
+        with self._lock:
+            err, self._error = self._error, None
+        return err
+
+    def mark_saved(self, ch: Character) -> None:
+        # an explicit save supersedes the draft; removal is queued behind any running write
+        self._written[ch.name] = (ch, ch.revision)
+        self._pool.submit(self._discard, ch.name)
+
+    def _discard(self, name: str) -> None:
+        try: self.storage.autosave_path(name).unlink()
+        except FileNotFoundError: pass
+
+    def discard(self, name: str) -> None:
+        self._pool.submit(self._discard, name)
+
+    # ---- recovery ----
+    def recoverable(self, name: str) -> bool:
+        draft = self.storage.autosave_path(name)
+        try: draft_ns = draft.stat().st_mtime_ns
+        except OSError: return False
+        saved_ns = self.storage.saved_mtime(name)
+        if saved_ns is None: return True
+        if draft_ns < saved_ns: return False
+        # row-level backends persist unlocks before the draft catches up; only offer real differences
+        saved = self.storage.load_character(name)
+        try: return saved is None or json.loads(draft.read_text(encoding="utf-8")) != saved.to_dict()
+        except (OSError, ValueError): return False
+
+    def recover(self, name: str) -> Optional[Character]:
+        try: ch = Character.from_dict(json.loads(self.storage.autosave_path(name).read_text(encoding="utf-8")))
+        except Exception as e:
+            print("Failed to read autosave for", name, e); return None
+        self._written[name] = (ch, ch.revision)
+        return ch
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+import json, multiprocessing, os, struct
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from ..core.models import JsonDescriptions, SkillTree
+from .atomic import atomic_write_text
+from .packed import PackedCatalog, write_packed
+
+# below this many dirty files a pool costs more to start than it saves
+PARALLEL_MIN_FILES = 64
+
+@dataclass
+class LoadError:
+    path: Path
+    message: str
+
+def _parse_tree_file(path: Path) -> Tuple[Optional[SkillTree], Optional[str]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return SkillTree.from_dict(data, source=JsonDescriptions(path)), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+@dataclass
+class CatalogEntry:
+    path: Path
+    mtime_ns: int
+    size: int
+    tree: SkillTree
+
+@dataclass
+class CatalogDelta:
+    added: Set[str] = field(default_factory=set)
+    changed: Set[str] = field(default_factory=set)
+    removed: Set[str] = field(default_factory=set)
+
+    @property
+    def ids(self) -> Set[str]:
+        return self.added | self.changed | self.removed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+# Parsed trees of a directory keyed by (path, mtime, size); refresh() only reparses what moved.
+# With a packed_path the first refresh takes every tree from the packed file instead,
+# as long as its manifest (file name -> mtime, size, tree id or load error) still
+# matches the directory; otherwise it parses the JSON as usual and rewrites the pack.
+class TreeCatalog:
+    def __init__(self, trees_dir: Path, workers: Optional[int] = 0, executor: str = "process",
+                 packed_path: Optional[Path] = None):
+        self.trees_dir = Path(trees_dir)
+        self.workers = workers  # 0/1 = serial, None = os.cpu_count()
+        self.executor = executor  # "process" or "thread"
+        self.packed_path = Path(packed_path) if packed_path else None
+        self._pack: Optional[PackedCatalog] = None
+        self._entries: Dict[Path, CatalogEntry] = {}
+        self._failed: Dict[Path, Tuple[int, int, LoadError]] = {}
+        self._trees: Dict[str, SkillTree] = {}
+        self._paths: Dict[str, Path] = {}
+
+    def trees(self) -> Dict[str, SkillTree]:
+        return dict(self._trees)
+
+    def get(self, tid: str):
+        return self._trees.get(tid)
+
+    def path_of(self, tid: str) -> Optional[Path]:
+        return self._paths.get(tid)
+
+    @property
+    def errors(self) -> List[LoadError]:
+        return [self._failed[p][2] for p in sorted(self._failed)]
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        seen: Dict[Path, Tuple[int, int]] = {}
+        for p in sorted(self.trees_dir.glob("*.json")):
+            try: st = p.stat()
+            except OSError: continue
+            seen[p] = (st.st_mtime_ns, st.st_size)
+        return seen
+
+    def _pool_size(self, n_files: int) -> int:
+        w = (os.cpu_count() or 1) if self.workers is None else self.workers
+        if w <= 1 or n_files < PARALLEL_MIN_FILES: return 1
+        return min(w, n_files)
+
+    def _parse_all(self, paths: List[Path]) -> List[Tuple[Optional[SkillTree], Optional[str]]]:
+        w = self._pool_size(len(paths))
+        if w == 1:
+            return [_parse_tree_file(p) for p in paths]
+        # spawned, not forked: the GUI calls this with Qt and worker threads already running
+        ex = ThreadPoolExecutor(max_workers=w) if self.executor == "thread" else \
+            ProcessPoolExecutor(max_workers=w, mp_context=multiprocessing.get_context("spawn"))
+        # map() yields in submission order, so the merge stays deterministic
+        with ex:
+            return list(ex.map(_parse_tree_file, paths, chunksize=max(1, len(paths) // (w * 4))))
+
+    def refresh(self) -> CatalogDelta:
+        seen = self._scan()
+        first = self.packed_path is not None and not self._entries and not self._failed
+        if first and self._open_packed(seen): return self._rebuild_ids()
+        for p in [p for p in self._entries if p not in seen]:
+            del self._entries[p]
+        for p in [p for p in self._failed if p not in seen]:
+            del self._failed[p]
+        todo: List[Path] = []
+        for p, (mtime, size) in seen.items():
+            e = self._entries.get(p)
+            if e and e.mtime_ns == mtime and e.size == size: continue
+            f = self._failed.get(p)
+            if f and f[0] == mtime and f[1] == size: continue
+            todo.append(p)
+        for p, (t, err) in zip(todo, self._parse_all(todo)):
+            mtime, size = seen[p]
+            if t is None:
+                self._entries.pop(p, None)
+                self._failed[p] = (mtime, size, LoadError(p, err or "unknown error")); continue
+            self._failed.pop(p, None)
+            self._entries[p] = CatalogEntry(p, mtime, size, t)
+        delta = self._rebuild_ids()
+        if first: self._write_packed()
+        return delta
+
+    # ---- packed snapshot ----
+    @property
+    def manifest_path(self) -> Path:
+        return self.packed_path.with_name(self.packed_path.name + ".json")
+
+    def invalidate_packed(self) -> None:
+        # a tree file changed under us; the next start parses JSON and rebuilds the pack
+        if self.packed_path is None: return
+        try: self.manifest_path.unlink()
+        except FileNotFoundError: pass
+
+    def _open_packed(self, seen: Dict[Path, Tuple[int, int]]) -> bool:
+        try: files = json.loads(self.manifest_path.read_text(encoding="utf-8"))["files"]
+        except (OSError, ValueError, KeyError, TypeError): return False
+        if not isinstance(files, dict) or set(files) != {p.name for p in seen}: return False
+        if any(files[p.name][:2] != [mtime, size] for p, (mtime, size) in seen.items()): return False
+        try: pack = PackedCatalog(self.packed_path)
+        except (OSError, ValueError, struct.error): return False
+        for p, (mtime, size) in seen.items():
+            tid, err = files[p.name][2:4]
+            t = pack.tree(tid) if err is None else None
+            if err is not None: self._failed[p] = (mtime, size, LoadError(p, err))
+            elif t is not None: self._entries[p] = CatalogEntry(p, mtime, size, t)
+            else:
+                pack.close(); self._entries.clear(); self._failed.clear(); return False
+        self._pack = pack
+        return True
+
+    def _write_packed(self) -> None:
+        # one record per tree id, so a library with duplicate ids stays on JSON
+        trees = [self._entries[p].tree for p in sorted(self._entries)]
+        if len({t.id for t in trees}) != len(trees): return
+        files = {p.name: [e.mtime_ns, e.size, e.tree.id, None] for p, e in self._entries.items()}
+        files.update({p.name: [m, s, None, err.message] for p, (m, s, err) in self._failed.items()})
+        self.invalidate_packed()
+        try:
+            write_packed(self.packed_path, trees)
+            atomic_write_text(self.manifest_path, json.dumps({"files": files}))
+        except OSError: pass
+
+    def _rebuild_ids(self) -> CatalogDelta:
+        # same precedence as before: on duplicate ids the last file in sorted order wins
+        old = self._trees
+        new: Dict[str, SkillTree] = {}; self._paths = {}
+        for p in sorted(self._entries):
+            t = self._entries[p].tree; new[t.id] = t; self._paths[t.id] = p
+        delta = CatalogDelta(
+            added=set(new) - set(old),
+            removed=set(old) - set(new),
+            changed={tid for tid, t in new.items() if tid in old and old[tid] is not t},
+        )
+        self._trees = new
+        return delta
@@ -0,0 +1,140 @@
+from __future__ import annotations
+import mmap, struct
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+from ..core.models import LazyText, SkillNode, SkillTree
+
+# Packed tree library: one file, opened with mmap, nodes materialized on access.
+#
+#   header   MAGIC, n_trees, n_nodes, n_strings, then offsets of the four sections
+#   trees    n_trees  x TREE_REC  (id, name, description, first node, node count)
+#   nodes    n_nodes  x NODE_REC  (id, name, description, prereqs, cost, ichor rank)
+#   strings  (n_strings + 1) x u64 offsets into a UTF-8 blob; string 0 is ""
+#
+# All text fields are string-table references; prereqs are stored as one string
+# joined with PREREQ_SEP so invalid multi-prereq trees round-trip unchanged.
+MAGIC = b"ISHPACK1"
+HEADER = struct.Struct("<8s3I4Q")
+TREE_REC = struct.Struct("<5I")
+NODE_REC = struct.Struct("<4IiB3x")
+OFFSET = struct.Struct("<Q")
+PREREQ_SEP = "\x1f"
+
+def write_packed(path: Path, trees: Iterable[SkillTree]) -> int:
+    strings: List[bytes] = [b""]; ids: Dict[str, int] = {"": 0}
+    def sref(s: str) -> int:
+        i = ids.get(s)
+        if i is None:
+            i = ids[s] = len(strings); strings.append(s.encode("utf-8"))
+        return i
+    tree_recs = bytearray(); node_recs = bytearray(); n_trees = n_nodes = 0
+    for t in trees:
+        tree_recs += TREE_REC.pack(sref(t.id), sref(t.name), sref(t.description), n_nodes, len(t.nodes))
+        for n in t.nodes.values():
+            node_recs += NODE_REC.pack(sref(n.id), sref(n.name), sref(n.description),
+                                       sref(PREREQ_SEP.join(n.prereq)), int(n.cost), n.ichor_rank)
+            n_nodes += 1
+        n_trees += 1
+    str_index = bytearray(); pos = 0
+    for b in strings:
+        str_index += OFFSET.pack(pos); pos += len(b)
+    str_index += OFFSET.pack(pos)
+    tree_off = HEADER.size
+    node_off = tree_off + len(tree_recs)
+    sidx_off = node_off + len(node_recs)
+    sdat_off = sidx_off + len(str_index)
+    tmp = Path(path).with_suffix(Path(path).suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, n_trees, n_nodes, len(strings), tree_off, node_off, sidx_off, sdat_off))
+        f.write(tree_recs); f.write(node_recs); f.write(str_index)
+        for b in strings: f.write(b)
+    tmp.replace(path)
+    return sdat_off + pos
+
+class PackedCatalog:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n_trees, self.n_nodes, self.n_strings, self._tree_off, self._node_off, self._sidx_off, self._sdat_off = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close(); raise ValueError(f"{self.path} is not a packed tree catalog.")
+        self._trees: Dict[str, int] = {}
+        for i in range(self.n_trees):
+            self._trees[self.string(TREE_REC.unpack_from(self._mm, self._tree_off + i * TREE_REC.size)[0])] = i
+
+    def close(self) -> None:
+        if getattr(self, "_mm", None) is not None: self._mm.close(); self._mm = None
+        self._file.close()
+
+    def string(self, i: int) -> str:
+        a = OFFSET.unpack_from(self._mm, self._sidx_off + i * 8)[0]
+        b = OFFSET.unpack_from(self._mm, self._sidx_off + i * 8 + 8)[0]
+        return self._mm[self._sdat_off + a:self._sdat_off + b].decode("utf-8")
+
+    def text(self, i: int) -> str:
+        return self.string(i)  # LazyText source protocol
+
+    def tree_ids(self) -> List[str]:
+        return list(self._trees)
+
+    def tree(self, tid: str) -> Optional[SkillTree]:
+        i = self._trees.get(tid)
+        if i is None: return None
+        id_s, name_s, desc_s, first, count = TREE_REC.unpack_from(self._mm, self._tree_off + i * TREE_REC.size)
+        return SkillTree(id=tid, name=self.string(name_s), description=self.string(desc_s),
+                         nodes=PackedNodes(self, first, count))
+
+    def trees(self) -> Dict[str, SkillTree]:
+        return {tid: self.tree(tid) for tid in self._trees}
+
+    def node_id(self, rec: int) -> str:
+        return self.string(NODE_REC.unpack_from(self._mm, self._node_off + rec * NODE_REC.size)[0])
+
+    def node(self, rec: int) -> SkillNode:
+        id_s, name_s, desc_s, pre_s, cost, rank = NODE_REC.unpack_from(self._mm, self._node_off + rec * NODE_REC.size)
+        pre = self.string(pre_s)
+        return SkillNode(id=self.string(id_s), name=self.string(name_s), cost=cost,
+                         description=LazyText(self, desc_s) if desc_s else "",
+                         prereq=pre.split(PREREQ_SEP) if pre else [], ichor_rank=rank)
+
+# dict-compatible node map of a packed tree: ids are read on first use, SkillNodes
+# on first lookup and their descriptions on first read; edits live in memory only
+# (save_tree / write_packed persist them)
+class PackedNodes(MutableMapping):
+    def __init__(self, cat: PackedCatalog, first: int, count: int):
+        self._cat = cat; self._first = first; self._count = count
+        self._slots: Optional[Dict[str, int]] = None  # id -> record, -1 for nodes added in memory
+        self._loaded: Dict[str, SkillNode] = {}
+
+    def _ids(self) -> Dict[str, int]:
+        if self._slots is None:
+            self._slots = {self._cat.node_id(r): r for r in range(self._first, self._first + self._count)}
+        return self._slots
+
+    def __getitem__(self, nid: str) -> SkillNode:
+        n = self._loaded.get(nid)
+        if n is None:
+            r = self._ids()[nid]
+            n = self._loaded[nid] = self._cat.node(r)
+        return n
+
+    def __setitem__(self, nid: str, node: SkillNode) -> None:
+        self._ids().setdefault(nid, -1); self._loaded[nid] = node
+
+    def __delitem__(self, nid: str) -> None:
+        del self._ids()[nid]; self._loaded.pop(nid, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids())
+
+    def __len__(self) -> int:
+        return self._count if self._slots is None else len(self._slots)
+
+    def __contains__(self, nid) -> bool:
+        return nid in self._loaded or nid in self._ids()
+
+    def loaded_count(self) -> int:
+        return len(self._loaded)
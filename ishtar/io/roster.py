@@ -0,0 +1,98 @@
+from __future__ import annotations
+import json, os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from ..core.models import Character
+from .atomic import atomic_write_text
+
+ROSTER_VERSION = 1
+
+def is_character_file(p: Path) -> bool:
+    return p.suffix == ".json" and not p.name.endswith(".autosave.json")
+
+@dataclass
+class RosterEntry:
+    name: str  # file stem, the key load_character() takes
+    xp_pool: int = 0
+    ichor_rank: int = 0
+    trees: List[str] = field(default_factory=list)
+    spent: int = 0
+    mtime_ns: int = 0
+    size: int = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.xp_pool - self.spent
+
+# Summary of every character file, kept in one JSON file outside the characters
+# directory. save/import update single entries; when the directory mtime no longer
+# matches (files copied in or deleted by hand) a stat scan re-parses only the files
+# whose (mtime, size) moved. `spent` is as of the character's last save.
+class RosterIndex:
+    def __init__(self, path: Path, chars_dir: Path, spent: Callable[[Character], int]):
+        self.path = Path(path)
+        self.chars_dir = Path(chars_dir)
+        self._spent = spent
+        self._entries: Optional[Dict[str, RosterEntry]] = None
+        self._dir_mtime = -1
+
+    def _load(self) -> None:
+        self._entries = {}
+        try:
+            d = json.loads(self.path.read_text(encoding="utf-8"))
+            if d.get("version") != ROSTER_VERSION: return
+            self._entries = {e["name"]: RosterEntry(**e) for e in d.get("entries", [])}
+            self._dir_mtime = int(d.get("dir_mtime_ns", -1))
+        except (OSError, ValueError, TypeError, KeyError):
+            self._entries = {}
+
+    def _save(self) -> None:
+        d = {"version": ROSTER_VERSION, "dir_mtime_ns": self._dir_mtime,
+             "entries": [asdict(e) for e in self._entries.values()]}
+        try: atomic_write_text(self.path, json.dumps(d, ensure_ascii=False))
+        except OSError as e: print("Failed to write roster", self.path, e)
+
+    def _entry(self, name: str, ch: Character, st: os.stat_result) -> RosterEntry:
+        return RosterEntry(name=name, xp_pool=ch.xp_pool, ichor_rank=ch.ichor_rank, trees=list(ch.trees),
+                           spent=self._spent(ch), mtime_ns=st.st_mtime_ns, size=st.st_size)
+
+    def _fresh(self) -> Dict[str, RosterEntry]:
+        if not self.is_current(): self.rescan()
+        return self._entries
+
+    def rescan(self) -> None:
+        if self._entries is None: self._load()
+        dir_mtime = os.stat(self.chars_dir).st_mtime_ns
+        old = self._entries; new: Dict[str, RosterEntry] = {}
+        with os.scandir(self.chars_dir) as it:
+            for de in it:
+                p = Path(de.path)
+                if not (de.is_file() and is_character_file(p)): continue
+                st = de.stat(); e = old.get(p.stem)
+                if e is None or e.mtime_ns != st.st_mtime_ns or e.size != st.st_size:
+                    try: e = self._entry(p.stem, Character.from_dict(json.loads(p.read_text(encoding="utf-8"))), st)
+                    except Exception as ex:
+                        print("Failed to index character", p, ex); continue
+                new[p.stem] = e
+        changed = new != old or dir_mtime != self._dir_mtime
+        self._entries = new; self._dir_mtime = dir_mtime
+        if changed: self._save()
+
+    def is_current(self) -> bool:
+        if self._entries is None: self._load()
+        return os.stat(self.chars_dir).st_mtime_ns == self._dir_mtime
+
+    def update(self, ch: Character, path: Path, was_current: bool) -> None:
+        # `path` was just written; if the index matched the directory before that
+        # write, it still does afterwards and needs no rescan
+        if self._entries is None: self._load()
+        self._entries[path.stem] = self._entry(path.stem, ch, os.stat(path))
+        if was_current: self._dir_mtime = os.stat(self.chars_dir).st_mtime_ns
+        self._save()
+
+    def entries(self, key: Optional[Callable[[RosterEntry], object]] = None, reverse: bool = False) -> List[RosterEntry]:
+        return sorted(self._fresh().values(), key=key or (lambda e: e.name), reverse=reverse)
+
+    def get(self, name: str) -> Optional[RosterEntry]:
+        return self._fresh().get(name)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+import json, sqlite3, time
+from pathlib import Path
+from typing import List, Optional, Tuple
+from ..core.models import Character, rank_to_index
+from .roster import RosterEntry, is_character_file
+from .storage import Storage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS characters (
+    name TEXT PRIMARY KEY,
+    xp_pool INTEGER NOT NULL DEFAULT 0,
+    ichor_rank INTEGER NOT NULL DEFAULT 0,
+    image TEXT
+);
+CREATE TABLE IF NOT EXISTS character_trees (
+    name TEXT NOT NULL REFERENCES characters(name) ON DELETE CASCADE ON UPDATE CASCADE,
+    tree_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (name, tree_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS unlocks (
+    name TEXT NOT NULL REFERENCES characters(name) ON DELETE CASCADE ON UPDATE CASCADE,
+    tree_id TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    PRIMARY KEY (name, tree_id, node_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS unlocks_by_tree ON unlocks (tree_id, node_id);
+CREATE TABLE IF NOT EXISTS saves (
+    name TEXT PRIMARY KEY REFERENCES characters(name) ON DELETE CASCADE ON UPDATE CASCADE,
+    saved_ns INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Character persistence in one SQLite database (WAL) instead of a JSON file per
+# character. Trees, images and exports stay on the file system via Storage.
+class SqliteStorage(Storage):
+    def __init__(self, root: Path, db_path: Optional[Path] = None, **kw):
+        super().__init__(root, **kw)
+        self.db_path = Path(db_path) if db_path else self.data_dir / "characters.sqlite3"
+        self.db = sqlite3.connect(str(self.db_path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def list_characters(self) -> List[str]:
+        return [r[0] for r in self.db.execute("SELECT name FROM characters ORDER BY name")]
+
+    def character_roster(self, key=None, reverse: bool = False) -> List[RosterEntry]:
+        entries = {name: RosterEntry(name=name, xp_pool=xp, ichor_rank=rank) for name, xp, rank in
+                   self.db.execute("SELECT name, xp_pool, ichor_rank FROM characters")}
+        for name, tid in self.db.execute("SELECT name, tree_id FROM character_trees ORDER BY name, position"):
+            entries[name].trees.append(tid)
+        trees = self.catalog.trees()
+        for name, tid, nid in self.db.execute("SELECT name, tree_id, node_id FROM unlocks"):
+            n = trees[tid].nodes.get(nid) if tid in trees else None
+            if n: entries[name].spent += n.cost
+        return sorted(entries.values(), key=key or (lambda e: e.name), reverse=reverse)
+
+    def load_character(self, name: str) -> Optional[Character]:
+        row = self.db.execute("SELECT xp_pool, ichor_rank, image FROM characters WHERE name=?", (name,)).fetchone()
+        if not row: return None
+        ch = Character(name=name, xp_pool=row[0], image=row[2], ichor_rank=rank_to_index(row[1]))
+        ch.trees = [r[0] for r in self.db.execute(
+            "SELECT tree_id FROM character_trees WHERE name=? ORDER BY position", (name,))]
+        for tid, nid in self.db.execute("SELECT tree_id, node_id FROM unlocks WHERE name=?", (name,)):
+            ch.unlocked.setdefault(tid, set()).add(nid)
+        for tid in ch.trees: ch.unlocked.setdefault(tid, set())
+        return ch
+
+    def save_character(self, ch: Character) -> None:
+        with self.db:
+            self._write(ch)
+
+    def _write(self, ch: Character) -> None:
+        db = self.db
+        db.execute("INSERT INTO characters(name, xp_pool, ichor_rank, image) VALUES (?,?,?,?) "
+                   "ON CONFLICT(name) DO UPDATE SET xp_pool=excluded.xp_pool, ichor_rank=excluded.ichor_rank, image=excluded.image",
+                   (ch.name, ch.xp_pool, ch.ichor_rank, ch.image))
+        db.execute("DELETE FROM character_trees WHERE name=?", (ch.name,))
+        db.executemany("INSERT INTO character_trees(name, tree_id, position) VALUES (?,?,?)",
+                       [(ch.name, tid, i) for i, tid in enumerate(dict.fromkeys(ch.trees))])
+        # only the difference against what is stored is written
+        stored = set(db.execute("SELECT tree_id, node_id FROM unlocks WHERE name=?", (ch.name,)))
+        wanted = {(tid, nid) for tid, ids in ch.unlocked.items() for nid in ids}
+        db.executemany("DELETE FROM unlocks WHERE name=? AND tree_id=? AND node_id=?",
+                       [(ch.name, tid, nid) for tid, nid in stored - wanted])
+        db.executemany("INSERT INTO unlocks(name, tree_id, node_id) VALUES (?,?,?)",
+                       [(ch.name, tid, nid) for tid, nid in wanted - stored])
+        self._stamp(ch.name)
+
+    def _stamp(self, name: str) -> None:
+        self.db.execute("INSERT INTO saves(name, saved_ns) VALUES (?,?) ON CONFLICT(name) DO UPDATE SET saved_ns=excluded.saved_ns",
+                        (name, time.time_ns()))
+
+    def saved_mtime(self, name: str) -> Optional[int]:
+        row = self.db.execute("SELECT saved_ns FROM saves WHERE name=?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def record_unlocks(self, ch: Character, tree_id: str, changes: List[Tuple[str, bool]]) -> None:
+        # one transaction for the whole action, so an unlocked path is stored entirely or not at all
+        if not self.db.execute("SELECT 1 FROM characters WHERE name=?", (ch.name,)).fetchone():
+            self.save_character(ch); return
+        with self.db:
+            self.db.executemany("INSERT INTO unlocks(name, tree_id, node_id) VALUES (?,?,?) ON CONFLICT DO NOTHING",
+                                [(ch.name, tree_id, nid) for nid, on in changes if on])
+            self.db.executemany("DELETE FROM unlocks WHERE name=? AND tree_id=? AND node_id=?",
+                                [(ch.name, tree_id, nid) for nid, on in changes if not on])
+            self._stamp(ch.name)
+
+    def character_file(self, name: str) -> Optional[Path]:
+        return None
+
+    def register_character_file(self, path: Path) -> None:
+        try: self.save_character(Character.from_dict(json.loads(Path(path).read_text(encoding="utf-8"))))
+        except Exception as e: print("Failed to import", path, e)
+
+    # ---- migration ----
+    def migrate_json_characters(self, overwrite: bool = False) -> List[str]:
+        have = set(self.list_characters()); done: List[str] = []
+        with self.db:
+            for p in sorted(self.chars_dir.glob("*.json")):
+                if not is_character_file(p): continue
+                try: ch = Character.from_dict(json.loads(p.read_text(encoding="utf-8")))
+                except Exception as e:
+                    print("Failed to migrate", p, e); continue
+                if ch.name in have and not overwrite: continue
+                self._write(ch); done.append(ch.name)
+        return done
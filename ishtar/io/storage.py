@@ -2,46 +2,133 @@
 from __future__ import annotations
 import json, zipfile, shutil
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from ..core.models import SkillTree, Character
+from .catalog import TreeCatalog, CatalogDelta, LoadError
+from .packed import PackedCatalog, write_packed
+from .archive import ArchiveReport, export_campaign, import_campaign
+from .atomic import atomic_write_text
+from .roster import RosterEntry, RosterIndex
+from .tabular import FORMATS, export_tree
+from .thumbnails import IMAGE_EXTS, ThumbnailCache
 
 class Storage:
-    def __init__(self, root: Path):
+    def __init__(self, root: Path, workers: Optional[int] = 0, executor: str = "process", packed: bool = False):
         self.root = Path(root)
         self.data_dir = self.root / "data"
         self.trees_dir = self.data_dir / "trees"
         self.chars_dir = self.data_dir / "characters"
         self.trees_dir.mkdir(parents=True, exist_ok=True)
         self.chars_dir.mkdir(parents=True, exist_ok=True)
+        self.catalog = TreeCatalog(self.trees_dir, workers=workers, executor=executor,
+                                   packed_path=self.packed_path if packed else None)
+        self.roster = RosterIndex(self.data_dir / "roster.json", self.chars_dir,
+                                  spent=lambda ch: ch.xp_spent_total(self.catalog.trees()))
+        self.thumbs = ThumbnailCache(self.data_dir / "thumbs")
+        self._layout_prefs: Optional[Dict[str, str]] = None
 
     def load_trees(self) -> Dict[str, SkillTree]:
-        out = {}
-        for p in sorted(self.trees_dir.glob("*.json")):
-            try: out[SkillTree.from_dict(json.loads(p.read_text(encoding='utf-8'))).id] = SkillTree.from_dict(json.loads(p.read_text(encoding='utf-8')))
-            except Exception as e: print("Failed to load", p, e)
-        # fix: compute once
-        trees = {}
-        for p in sorted(self.trees_dir.glob("*.json")):
-            try:
-                data = json.loads(p.read_text(encoding='utf-8'))
-                t = SkillTree.from_dict(data); trees[t.id] = t
-            except Exception as e:
-                print("Failed to load", p, e)
-        return trees
+        self.catalog.refresh()
+        return self.catalog.trees()
+
+    def refresh_trees(self) -> CatalogDelta:
+        return self.catalog.refresh()
+
+    def tree_load_errors(self) -> List[LoadError]:
+        return self.catalog.errors
+
+    # ---- packed catalog (optional, JSON stays the editable source; see TreeCatalog) ----
+    @property
+    def packed_path(self) -> Path:
+        return self.data_dir / "trees.ishpack"
+
+    def write_packed_catalog(self, path: Optional[Path] = None) -> Path:
+        out = Path(path) if path else self.packed_path
+        trees = self.load_trees()
+        write_packed(out, (trees[tid] for tid in sorted(trees)))
+        return out
+
+    def open_packed_catalog(self, path: Optional[Path] = None) -> PackedCatalog:
+        return PackedCatalog(Path(path) if path else self.packed_path)
+
+    # ---- per-tree layout choice (data/layout_prefs.json: {tree id: layout mode}) ----
+    @property
+    def layout_prefs_path(self) -> Path:
+        return self.data_dir / "layout_prefs.json"
+
+    def _load_layout_prefs(self) -> Dict[str, str]:
+        if self._layout_prefs is None:
+            try: d = json.loads(self.layout_prefs_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError): d = {}
+            self._layout_prefs = {k: v for k, v in d.items() if isinstance(v, str)} if isinstance(d, dict) else {}
+        return self._layout_prefs
+
+    def layout_mode(self, tree_id: str) -> Optional[str]:
+        return self._load_layout_prefs().get(tree_id)
+
+    def set_layout_mode(self, tree_id: str, mode: str) -> None:
+        prefs = self._load_layout_prefs()
+        if prefs.get(tree_id) == mode: return
+        prefs[tree_id] = mode
+        atomic_write_text(self.layout_prefs_path, json.dumps(prefs, indent=2, sort_keys=True, ensure_ascii=False))
 
     def save_tree(self, t: SkillTree) -> None:
-        (self.trees_dir / f"{t.id}.json").write_text(json.dumps(t.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+        atomic_write_text(self.trees_dir / f"{t.id}.json", json.dumps(t.to_dict(), indent=2, ensure_ascii=False))
+        self.catalog.invalidate_packed()
+
+    def export_trees(self, out_dir: Path, fmt: str = "csv", tree_ids: Optional[List[str]] = None) -> List[Path]:
+        # one file per tree, each streamed row by row (see io/tabular.py)
+        out_dir = Path(out_dir); out_dir.mkdir(parents=True, exist_ok=True)
+        trees = self.load_trees(); out: List[Path] = []
+        for tid in (tree_ids if tree_ids is not None else sorted(trees)):
+            t = trees.get(tid)
+            if t is None: continue
+            p = out_dir / f"{tid}{FORMATS[fmt]}"; export_tree(t, p, fmt); out.append(p)
+        return out
 
     def list_characters(self) -> List[str]:
-        return sorted([p.stem for p in self.chars_dir.glob("*.json")])
+        return [e.name for e in self.roster.entries()]
+
+    def character_roster(self, key=None, reverse: bool = False) -> List[RosterEntry]:
+        return self.roster.entries(key, reverse)
 
     def load_character(self, name: str) -> Optional[Character]:
-        p = self.chars_dir / f"{name}.json"
+        p = self.character_path(name)
         if not p.exists(): return None
         return Character.from_dict(json.loads(p.read_text(encoding="utf-8")))
 
     def save_character(self, ch: Character) -> None:
-        (self.chars_dir / f"{ch.name}.json").write_text(json.dumps(ch.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+        p = self.character_path(ch.name); was_current = self.roster.is_current()
+        atomic_write_text(p, json.dumps(ch.to_dict(), indent=2, ensure_ascii=False))
+        self.roster.update(ch, p, was_current)
+
+    def character_path(self, name: str) -> Path:
+        return self.chars_dir / f"{name}.json"
+
+    def saved_mtime(self, name: str) -> Optional[int]:
+        # when the character was last persisted (ns since the epoch), None if never
+        try: return self.character_path(name).stat().st_mtime_ns
+        except OSError: return None
+
+    def character_file(self, name: str) -> Optional[Path]:
+        # the file that holds the character, if this backend keeps one
+        p = self.character_path(name)
+        return p if p.exists() else None
+
+    def register_character_file(self, path: Path) -> None:
+        # a character JSON was placed in chars_dir (archive import); the roster picks it up on its own
+        pass
+
+    def autosave_path(self, name: str) -> Path:
+        return self.chars_dir / f"{name}.autosave.json"
+
+    def record_unlock(self, ch: Character, tree_id: str, node_id: str, unlocked: bool) -> None:
+        self.record_unlocks(ch, tree_id, [(node_id, unlocked)])
+
+    def record_unlocks(self, ch: Character, tree_id: str, changes: List[Tuple[str, bool]]) -> None:
+        # JSON characters are written as a whole on save; row-level backends persist the
+        # (node id, unlocked) changes of one action here, all or nothing
+        pass
 
     def set_character_image(self, ch: Character, src: Path) -> str:
         ext = src.suffix.lower() or ".png"
@@ -49,6 +136,7 @@ class Storage:
         dest = self.chars_dir / dest_name
         shutil.copy2(src, dest)
         ch.image = dest_name; self.save_character(ch)
+        self.thumbs.generate(dest)
         return dest_name
 
     def character_image_path(self, ch: Character):
@@ -56,6 +144,9 @@ class Storage:
         p = self.chars_dir / ch.image
         return p if p.exists() else None
 
+    def character_images(self) -> List[Path]:
+        return sorted(p for p in self.chars_dir.iterdir() if p.suffix.lower() in IMAGE_EXTS and p.is_file())
+
     def export_character_zip(self, name: str, out_zip: Path) -> bool:
         ch = self.load_character(name)
         if not ch: return False
@@ -66,6 +157,13 @@ class Storage:
                 if img.exists(): z.write(img, ch.image)
         return True
 
+    # ---- campaign archives ----
+    def export_campaign(self, out_zip: Path, progress=None) -> ArchiveReport:
+        return export_campaign(self, out_zip, progress)
+
+    def import_campaign(self, path: Path, progress=None) -> ArchiveReport:
+        return import_campaign(self, path, progress)
+
     def import_character(self, path: Path) -> Optional[str]:
         p = Path(path)
         if p.suffix.lower()==".zip":
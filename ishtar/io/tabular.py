@@ -0,0 +1,158 @@
+from __future__ import annotations
+import argparse, csv, io, itertools, json, os, sys, threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence
+from ..core.models import SkillNode, SkillTree, rank_name, rank_to_index
+
+# Spreadsheet layout of a tree: one node per row, optional header row.
+COLUMNS = ("id", "name", "cost", "prereq", "ichor_rank", "description")
+HEADER_HINTS = ("id", "name", "cost")
+PREREQ_SEP = "|"  # between prerequisites in one cell; JSON Lines use a list
+BATCH_ROWS = 2000
+FORMATS = {"csv": ".csv", "tsv": ".tsv", "jsonl": ".jsonl"}
+
+@dataclass
+class RowError:
+    line: int
+    message: str
+
+@dataclass
+class ImportBatch:
+    nodes: List[SkillNode] = field(default_factory=list)
+    errors: List[RowError] = field(default_factory=list)
+    bytes_read: int = 0
+    total_bytes: int = 0
+
+def sniff_delimiter(sample: str) -> str:
+    if "\t" in sample: return "\t"
+    if ";" in sample: return ";"
+    return ","
+
+def node_from_row(parts: Sequence[str]) -> SkillNode:
+    if len(parts) < 3: raise ValueError(f"expected at least 3 columns, got {len(parts)}")
+    idv = parts[0].strip()
+    if not idv: raise ValueError("empty id")
+    name = parts[1].strip() or idv
+    raw_cost = parts[2].strip()
+    try: cost = int(raw_cost or "0")
+    except ValueError: raise ValueError(f"invalid cost '{raw_cost}'") from None
+    prereq = [p.strip() for p in parts[3].split(PREREQ_SEP) if p.strip()] if len(parts) > 3 else []
+    ichor = rank_to_index(parts[4].strip()) if len(parts) > 4 else 0
+    desc = parts[5].strip() if len(parts) > 5 else ""
+    return SkillNode(id=idv, name=name, cost=cost, description=desc, prereq=prereq, ichor_rank=ichor)
+
+class _JsonlReader:
+    # csv.reader look-alike (iteration + line_num) for .jsonl files
+    def __init__(self, f):
+        self._f = f; self.line_num = 0
+
+    def __iter__(self):
+        for line in self._f:
+            self.line_num += 1
+            if not line.strip(): yield []; continue
+            try: d = json.loads(line)
+            except ValueError as e: yield ValueError(f"invalid JSON: {e}"); continue
+            if not isinstance(d, dict): yield ValueError("row is not a JSON object"); continue
+            pre = d.get("prereq")
+            if isinstance(pre, list): d["prereq"] = PREREQ_SEP.join(str(p) for p in pre)
+            yield ["" if d.get(c) is None else str(d.get(c)) for c in COLUMNS]
+
+# Reads `path` with the csv module (quoted fields may hold delimiters and newlines)
+# and yields nodes in batches, so callers can apply and redraw as rows arrive.
+# The delimiter is picked from the first non-blank line: tab, then ';', else ','.
+# .jsonl files hold one object per line with the COLUMNS keys.
+def iter_import_batches(path: Path, batch_rows: int = BATCH_ROWS,
+                        cancel: Optional[threading.Event] = None) -> Iterator[ImportBatch]:
+    total = os.path.getsize(path)
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if Path(path).suffix.lower() == ".jsonl":
+            yield from _batches(_JsonlReader(f), f, 0, total, batch_rows, cancel, header=False); return
+        first = ""; skipped = 0
+        for first in f:
+            if first.strip(): break
+            skipped += 1
+        if not first.strip(): return
+        rows = csv.reader(itertools.chain([first], f), delimiter=sniff_delimiter(first))
+        yield from _batches(rows, f, skipped, total, batch_rows, cancel, header=True)
+
+def _batches(rows, f, skipped: int, total: int, batch_rows: int,
+             cancel: Optional[threading.Event], header: bool) -> Iterator[ImportBatch]:
+    b = ImportBatch(total_bytes=total); header_checked = not header
+    for parts in rows:
+        if isinstance(parts, ValueError):
+            b.errors.append(RowError(rows.line_num + skipped, str(parts))); continue
+        if not any(p.strip() for p in parts): continue
+        if not header_checked:
+            header_checked = True
+            if any(p.strip().lower() in HEADER_HINTS for p in parts[:3]): continue
+        try: b.nodes.append(node_from_row(parts))
+        except ValueError as e: b.errors.append(RowError(rows.line_num + skipped, str(e)))
+        if len(b.nodes) + len(b.errors) >= batch_rows:
+            b.bytes_read = f.buffer.tell(); yield b
+            if cancel is not None and cancel.is_set(): return
+            b = ImportBatch(total_bytes=total)
+    b.bytes_read = total
+    if b.nodes or b.errors: yield b
+
+# ---- Export ----
+def node_row(n: SkillNode) -> List[str]:
+    # every prereq, so trees the validator would flag still round-trip unchanged
+    return [n.id, n.name, str(n.cost), PREREQ_SEP.join(n.prereq), rank_name(n.ichor_rank), n.description]
+
+def format_for(path: Path) -> str:
+    ext = Path(path).suffix.lower()
+    for fmt, e in FORMATS.items():
+        if e == ext: return fmt
+    raise ValueError(f"Unknown export format '{ext}' (use {', '.join(FORMATS.values())}).")
+
+def iter_export(nodes: Iterable[SkillNode], fmt: str = "csv", header: bool = True) -> Iterator[str]:
+    # one text chunk per node; only the current row is held in memory
+    if fmt == "jsonl":
+        for n in nodes:
+            r = node_row(n)
+            yield json.dumps({"id": r[0], "name": r[1], "cost": n.cost, "prereq": list(n.prereq),
+                              "ichor_rank": r[4], "description": r[5]}, ensure_ascii=False) + "\n"
+        return
+    if fmt not in FORMATS: raise ValueError(f"Unknown export format '{fmt}'.")
+    buf = io.StringIO(); w = csv.writer(buf, delimiter="\t" if fmt == "tsv" else ",", lineterminator="\n")
+    def line(row) -> str:
+        buf.seek(0); buf.truncate(); w.writerow(row); return buf.getvalue()
+    if header: yield line(COLUMNS)
+    for n in nodes: yield line(node_row(n))
+
+def export_tree(tree: SkillTree, path: Path, fmt: Optional[str] = None) -> int:
+    # streamed into a temp file next to `path`, swapped in when complete; returns rows written
+    path = Path(path); fmt = fmt or format_for(path); rows = 0
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            for chunk in iter_export(tree.nodes.values(), fmt):
+                f.write(chunk); rows += 1
+        os.replace(tmp, path)
+    except BaseException:
+        try: os.unlink(tmp)
+        except OSError: pass
+        raise
+    return rows - (fmt != "jsonl")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .storage import Storage
+    ap = argparse.ArgumentParser(prog="python -m ishtar.io.tabular", description="Export skill trees as CSV, TSV or JSON Lines.")
+    ap.add_argument("root", type=Path, help="ISHTAR root (the folder that contains data/)")
+    ap.add_argument("out", type=Path, help="output directory, or a file when exporting one tree")
+    ap.add_argument("--format", choices=sorted(FORMATS), default=None, help="default: csv, or the output file's extension")
+    ap.add_argument("--tree", action="append", default=None, help="tree id to export (repeatable); default all")
+    a = ap.parse_args(argv)
+    st = Storage(a.root)
+    if a.out.suffix and a.tree and len(a.tree) == 1:
+        t = st.load_trees().get(a.tree[0])
+        if not t: print(f"Unknown tree '{a.tree[0]}'.", file=sys.stderr); return 1
+        n = export_tree(t, a.out, a.format or format_for(a.out)); print(f"{t.id}: {n} node(s) -> {a.out}"); return 0
+    for p in st.export_trees(a.out, a.format or "csv", a.tree):
+        print(p)
+    for e in st.tree_load_errors(): print(f"skipped {e.path.name}: {e.message}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
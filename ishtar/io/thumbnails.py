@@ -0,0 +1,60 @@
+from __future__ import annotations
+import os, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+THUMB_SIZES = (64, 128, 256)  # longest edge in px
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
+
+# Scaled-down portrait copies, named after the source file and its mtime so an
+# edited image never reuses stale thumbnails. Uses QImage only, which is safe to
+# decode/scale/save off the GUI thread.
+class ThumbnailCache:
+    def __init__(self, cache_dir: Path, sizes=THUMB_SIZES):
+        self.cache_dir = Path(cache_dir)
+        self.sizes = tuple(sorted(sizes))
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def path_for(self, src: Path, size: int) -> Path:
+        return self.cache_dir / f"{src.name}.{src.stat().st_mtime_ns}.{size}.png"
+
+    def _prune(self, src: Path, keep: Iterable[Path]) -> None:
+        keep = set(keep)
+        for p in self.cache_dir.glob(f"{src.name}.*.png"):
+            if p not in keep and p.name[len(src.name) + 1:].split(".")[0].isdigit():
+                try: p.unlink()
+                except OSError: pass
+
+    def generate(self, src: Path) -> List[Path]:
+        from PySide6 import QtCore, QtGui
+        src = Path(src)
+        if not src.exists(): return []
+        targets = [self.path_for(src, s) for s in self.sizes]
+        if all(p.exists() for p in targets): return targets
+        img = QtGui.QImage(str(src))
+        if img.isNull(): return []
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # largest first, each step scales the previous result (no upscaling)
+        for s, p in sorted(zip(self.sizes, targets), reverse=True):
+            if max(img.width(), img.height()) > s:
+                img = img.scaled(s, s, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+            tmp = p.with_name(f"{p.name}.{threading.get_ident()}.tmp")
+            if not img.save(str(tmp), "PNG"): return []
+            os.replace(tmp, p)
+        self._prune(src, targets)
+        return targets
+
+    def nearest(self, src: Path, edge: int) -> Optional[Path]:
+        # smallest thumbnail that still covers `edge` px, else the largest one; None if not generated
+        want = next((s for s in self.sizes if s >= edge), self.sizes[-1])
+        try: p = self.path_for(Path(src), want)
+        except OSError: return None
+        return p if p.exists() else None
+
+    def generate_async(self, sources: Iterable[Path], workers: int = 2) -> List[Future]:
+        if self._pool is None: self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        return [self._pool.submit(self.generate, Path(s)) for s in sources]
+
+    def shutdown(self, wait: bool = False) -> None:
+        if self._pool is not None: self._pool.shutdown(wait=wait, cancel_futures=True); self._pool = None
@@ -0,0 +1,54 @@
+from __future__ import annotations
+from PySide6 import QtCore
+from .catalog import CatalogDelta
+from .storage import Storage
+
+# Live reload of the trees directory. QFileSystemWatcher (inotify, FSEvents, ...)
+# catches local edits right away; a slow stat poll covers network shares where
+# those notifications never arrive. Either way the work is one catalog refresh,
+# which stats every file and only reparses the ones whose (mtime, size) moved.
+class TreeWatcher(QtCore.QObject):
+    treesChanged = QtCore.Signal(object)  # CatalogDelta; emitted when trees or load errors changed
+
+    def __init__(self, storage: Storage, poll_ms: int = 3000, debounce_ms: int = 300, parent=None):
+        super().__init__(parent)
+        self.storage = storage
+        self._fs = QtCore.QFileSystemWatcher(self)
+        self._fs.directoryChanged.connect(self._schedule)
+        self._fs.fileChanged.connect(self._schedule)
+        # editors save in several steps; wait for the burst to settle before reparsing
+        self._debounce = QtCore.QTimer(self); self._debounce.setSingleShot(True); self._debounce.setInterval(debounce_ms)
+        self._debounce.timeout.connect(self.check)
+        self._poll = QtCore.QTimer(self); self._poll.setInterval(poll_ms)
+        self._poll.timeout.connect(self.check)
+        self._errors: tuple = ()
+
+    def is_active(self) -> bool:
+        return self._poll.isActive()
+
+    def start(self) -> None:
+        self._rewatch(); self._poll.start()
+
+    def stop(self) -> None:
+        self._poll.stop(); self._debounce.stop()
+        paths = self._fs.directories() + self._fs.files()
+        if paths: self._fs.removePaths(paths)
+
+    def _schedule(self, _path: str = "") -> None:
+        if self.is_active(): self._debounce.start()
+
+    def _rewatch(self) -> None:
+        # files replaced via rename drop out of the watch list; re-add whatever exists now
+        want = {str(self.storage.trees_dir)} | {str(p) for p in self.storage.trees_dir.glob("*.json")}
+        have = set(self._fs.directories()) | set(self._fs.files())
+        stale = sorted(have - want); new = sorted(want - have)
+        if stale: self._fs.removePaths(stale)
+        if new: self._fs.addPaths(new)
+
+    def check(self) -> CatalogDelta:
+        delta = self.storage.refresh_trees()
+        if self.is_active(): self._rewatch()
+        errors = tuple((e.path, e.message) for e in self.storage.tree_load_errors())
+        if delta or errors != self._errors: self.treesChanged.emit(delta)
+        self._errors = errors
+        return delta
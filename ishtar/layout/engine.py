@@ -0,0 +1,351 @@
+from __future__ import annotations
+import math
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from ..core.models import SkillTree
+
+NODE_W = 160
+NODE_H = 80
+LEVEL_V_SPACING = 130
+SIBLING_H_SPACING = 40
+ROOT_GAP = NODE_W  # extra space between the subtrees of two roots
+MARGIN_X = 20
+H_LEVEL_SPACING = 80  # gap between depth columns in the left-to-right layout
+
+MODES = ("classic", "tidy", "horizontal", "radial", "lanes")
+# how edges attach: parent bottom to child top, parent right to child left, or centre to centre
+ORIENTATIONS = {"classic": "down", "tidy": "down", "lanes": "down", "horizontal": "right", "radial": "radial"}
+
+@dataclass(frozen=True)
+class LayoutParams:
+    node_w: float = NODE_W
+    node_h: float = NODE_H
+    level_gap: float = LEVEL_V_SPACING
+    sibling_gap: float = SIBLING_H_SPACING
+    root_gap: float = ROOT_GAP
+
+# Top-left corner of every node, slot i belonging to ids[i]. Nodes that hang off
+# a prerequisite cycle are not reachable from any root and are parked as extra
+# top-level leaves after the last root.
+class Layout:
+    def __init__(self, ids: List[str], xs: array, ys: array, mode: str):
+        self.ids = ids
+        self.xs = xs
+        self.ys = ys
+        self.mode = mode
+        self.slot = {nid: i for i, nid in enumerate(ids)}
+
+    @property
+    def orientation(self) -> str:
+        return ORIENTATIONS[self.mode]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def pos(self, nid: str) -> Optional[Tuple[float, float]]:
+        i = self.slot.get(nid)
+        return None if i is None else (self.xs[i], self.ys[i])
+
+    def items(self) -> Iterator[Tuple[str, float, float]]:
+        return zip(self.ids, self.xs, self.ys)
+
+    def bounds(self, p: LayoutParams = LayoutParams()) -> Tuple[float, float, float, float]:
+        if not self.ids: return (0.0, 0.0, 0.0, 0.0)
+        return (min(self.xs), min(self.ys), max(self.xs) + p.node_w, max(self.ys) + p.node_h)
+
+def _forest(tree: "SkillTree") -> Tuple[List[str], Dict[str, List[str]], List[str]]:
+    # preorder of every node, children lists, and the top-level entries in order
+    idx = tree.index
+    tops = idx.roots + idx.orphans
+    order = idx.order + idx.cyclic
+    if not idx.cyclic: return order, idx.children, tops
+    children = dict(idx.children)
+    for nid in idx.cyclic: children[nid] = []  # cut the loop; cyclic nodes become leaves
+    return order, children, tops + idx.cyclic
+
+def _depths(order: List[str], children: Dict[str, List[str]], tops: List[str]) -> Dict[str, int]:
+    depth = dict.fromkeys(tops, 0)
+    for nid in order:
+        d = depth[nid] + 1
+        for c in children[nid]: depth[c] = d
+    return depth
+
+# ---- classic: leaves on one cursor, parents centred over their children ----
+# Every subtree is laid out in its own frame: span is its width (leaf slots times
+# the leaf step), lead the x of its root from the frame's left edge, and off a
+# node's x relative to its parent. A frame depends on nothing outside its subtree,
+# so after an edit only the frames on the changed ancestor chains need redoing.
+def _classic_frame(nid: str, children, step: float, span, lead, off) -> None:
+    kids = children[nid]
+    if not kids:
+        span[nid] = step; lead[nid] = 0.0; return
+    left = 0.0; xs = []
+    for k in kids:
+        xs.append(left + lead[k]); left += span[k]
+    mid = sum(xs) / len(xs)
+    for k, kx in zip(kids, xs): off[k] = kx - mid
+    span[nid] = left; lead[nid] = mid
+
+def _classic_place(order, children, tops, p: LayoutParams, span, lead, off) -> Dict[str, float]:
+    x: Dict[str, float] = {}; cursor = 0.0
+    for i, t in enumerate(tops):
+        if i: cursor += p.root_gap
+        x[t] = cursor + lead[t]; cursor += span[t]
+    for nid in order:  # preorder: parents are placed before their children
+        px = x[nid]
+        for c in children[nid]: x[c] = px + off[c]
+    return x
+
+def _classic(order, children, tops, p: LayoutParams) -> Dict[str, float]:
+    step = p.node_w + p.sibling_gap
+    span: Dict[str, float] = {}; lead: Dict[str, float] = {}; off: Dict[str, float] = {}
+    for nid in reversed(order): _classic_frame(nid, children, step, span, lead, off)
+    return _classic_place(order, children, tops, p, span, lead, off)
+
+# ---- tidy: Reingold-Tilford contour merging ----
+# Each finished subtree keeps its left and right contour (extreme x per depth,
+# relative to the subtree root) as lists stored deepest-first, so adding the
+# parent level is an append, plus a scalar offset so a whole contour can shift
+# in O(1). Placing a subtree next to its left siblings compares and merges only
+# the levels both have; the taller contour is reused in place, which keeps the
+# total work linear in the number of nodes.
+class _Contour:
+    __slots__ = ("vals", "off")
+
+    def __init__(self, vals: List[float], off: float):
+        self.vals = vals; self.off = off
+
+def _place_row(subs: List[Tuple[_Contour, _Contour]], sep: float) -> Tuple[List[float], _Contour, _Contour]:
+    # returns each subtree's x within the row and the row's merged contours
+    xs = [0.0]
+    fl, fr = subs[0]
+    for sl, sr in subs[1:]:
+        a, b = fr.vals, sl.vals
+        n = min(len(a), len(b))
+        shift = max((a[-1 - k] + fr.off) - (b[-1 - k] + sl.off) for k in range(n)) + sep
+        xs.append(shift)
+        # right contour: the new subtree's right edge, plus the old one where it is deeper
+        if len(sr.vals) >= len(fr.vals):
+            fr = _Contour(sr.vals, sr.off + shift)
+        else:
+            v = fr.vals; d = sr.off + shift - fr.off
+            for k in range(1, len(sr.vals) + 1): v[-k] = sr.vals[-k] + d
+        # left contour: the old left edge, extended by the new subtree where it is deeper
+        if len(sl.vals) > len(fl.vals):
+            v = sl.vals; d = fl.off - (sl.off + shift)
+            for k in range(1, len(fl.vals) + 1): v[-k] = fl.vals[-k] + d
+            fl = _Contour(v, sl.off + shift)
+    return xs, fl, fr
+
+def _tidy(order, children, tops, p: LayoutParams) -> Dict[str, float]:
+    sep = p.node_w + p.sibling_gap
+    rel: Dict[str, float] = {}  # x relative to the parent
+    cont: Dict[str, Tuple[_Contour, _Contour]] = {}
+    for nid in reversed(order):  # children are finished before their parent
+        kids = children[nid]
+        if not kids:
+            cont[nid] = (_Contour([0.0], 0.0), _Contour([0.0], 0.0)); continue
+        xs, fl, fr = _place_row([cont.pop(k) for k in kids], sep)
+        mid = (xs[0] + xs[-1]) / 2
+        for k, kx in zip(kids, xs): rel[k] = kx - mid
+        fl.vals.append(mid - fl.off); fr.vals.append(mid - fr.off)
+        fl.off -= mid; fr.off -= mid
+        cont[nid] = (fl, fr)
+    x: Dict[str, float] = {}
+    if tops:
+        xs, _, _ = _place_row([cont.pop(t) for t in tops], sep + p.root_gap)
+        for t, tx in zip(tops, xs): x[t] = tx
+    for nid in order:
+        px = x[nid]
+        for c in children[nid]: x[c] = px + rel[c]
+    return x
+
+def layout_tree(tree: "SkillTree", mode: str = "classic", params: Optional[LayoutParams] = None) -> Layout:
+    p = params or LayoutParams()
+    if mode not in MODES: raise ValueError(f"Unknown layout mode '{mode}'.")
+    order, children, tops = _forest(tree)
+    depth = _depths(order, children, tops)
+    if mode in ("classic", "tidy"):
+        x = (_tidy if mode == "tidy" else _classic)(order, children, tops, p)
+        return _build(order, x, _rows(depth, p), mode)
+    x, y = _STRATEGIES[mode](order, children, tops, depth, p)
+    return _build(order, x, y, mode)
+
+def _rows(depth: Dict[str, int], p: LayoutParams) -> Dict[str, float]:
+    step = p.node_h + p.level_gap
+    return {nid: d * step for nid, d in depth.items()}
+
+def _build(order: List[str], x: Dict[str, float], y: Dict[str, float], mode: str) -> Layout:
+    # shifted so the leftmost node sits MARGIN_X from the origin and the topmost at y 0
+    dx = MARGIN_X - min(x.values()) if x else 0.0
+    dy = -min(y.values()) if y else 0.0
+    xs = array("d", (x[nid] + dx for nid in order))
+    ys = array("d", (y[nid] + dy for nid in order))
+    return Layout(order, xs, ys, mode)
+
+# ---- horizontal: the tidy layout turned on its side, roots on the left ----
+def _horizontal(order, children, tops, depth, p: LayoutParams):
+    y = _tidy(order, children, tops, replace(p, node_w=p.node_h, root_gap=p.node_h))
+    step = p.node_w + H_LEVEL_SPACING
+    return {nid: depth[nid] * step for nid in order}, y
+
+# ---- radial: roots at the centre, every subtree gets a wedge sized by its leaf count ----
+# A single root sits in the middle; several roots share the first ring. Each ring is
+# one level step further out than the previous one, or further still when the two
+# closest neighbours on it would otherwise overlap.
+def _radial(order, children, tops, depth, p: LayoutParams):
+    if not order: return {}, {}
+    leaves: Dict[str, int] = {}
+    for nid in reversed(order):
+        kids = children[nid]
+        leaves[nid] = sum(leaves[k] for k in kids) if kids else 1
+    unit = 2 * math.pi / sum(leaves[t] for t in tops)
+    ang: Dict[str, float] = {}; start: Dict[str, float] = {}; a = 0.0
+    for t in tops:
+        start[t] = a; a += leaves[t] * unit
+    for nid in order:
+        a0 = start[nid]; ang[nid] = a0 + leaves[nid] * unit / 2
+        for c in children[nid]:
+            start[c] = a0; a0 += leaves[c] * unit
+    shift = 0 if len(tops) == 1 else 1
+    rings = max(depth.values()) + shift + 1
+    first: List[Optional[float]] = [None] * rings; last: List[Optional[float]] = [None] * rings
+    closest = [2 * math.pi] * rings
+    for nid in order:  # preorder meets the nodes of each ring in increasing angle
+        r = depth[nid] + shift; a = ang[nid]
+        if last[r] is None: first[r] = a
+        else: closest[r] = min(closest[r], a - last[r])
+        last[r] = a
+    radius = [0.0] * rings; need = p.node_w + p.sibling_gap
+    for r in range(1, rings):
+        gap = min(closest[r], 2 * math.pi - (last[r] - first[r])) if last[r] is not None and last[r] != first[r] else 2 * math.pi
+        chord = need / (2 * math.sin(gap / 2)) if gap < math.pi else 0.0
+        radius[r] = max(radius[r - 1] + need, chord)
+    x: Dict[str, float] = {}; y: Dict[str, float] = {}
+    for nid in order:
+        rad = radius[depth[nid] + shift]; a = ang[nid] - math.pi / 2  # first subtree starts at twelve o'clock
+        x[nid] = rad * math.cos(a) - p.node_w / 2; y[nid] = rad * math.sin(a) - p.node_h / 2
+    return x, y
+
+# ---- lanes: every root subtree laid out tidy, then shelf-packed into a squarish block ----
+# Subtrees are taken tallest first (bucketed by depth, so no sort) and placed left to
+# right until a row reaches the width of a square with the same total area.
+def _lanes(order, children, tops, depth, p: LayoutParams):
+    x = _tidy(order, children, tops, p)
+    top_of = {t: t for t in tops}
+    lo = {t: x[t] for t in tops}; hi = dict(lo); rows = dict.fromkeys(tops, 0)
+    for nid in order:
+        t = top_of[nid]; v = x[nid]
+        if v < lo[t]: lo[t] = v
+        elif v > hi[t]: hi[t] = v
+        if depth[nid] > rows[t]: rows[t] = depth[nid]
+        for c in children[nid]: top_of[c] = t
+    step = p.node_h + p.level_gap
+    w = {t: hi[t] - lo[t] + p.node_w for t in tops}
+    h = {t: rows[t] * step + p.node_h for t in tops}
+    target = math.sqrt(sum((w[t] + p.root_gap) * (h[t] + p.level_gap) for t in tops))
+    target = max(target, max(w.values(), default=0.0))
+    buckets: List[List[str]] = [[] for _ in range(max(rows.values(), default=0) + 1)]
+    for t in tops: buckets[rows[t]].append(t)
+    ox: Dict[str, float] = {}; oy: Dict[str, float] = {}
+    sx = sy = shelf = 0.0
+    for b in reversed(buckets):
+        for t in b:
+            if sx > 0 and sx + w[t] > target:
+                sy += shelf + p.level_gap; sx = shelf = 0.0
+            ox[t] = sx - lo[t]; oy[t] = sy
+            sx += w[t] + p.root_gap; shelf = max(shelf, h[t])
+    return ({nid: x[nid] + ox[top_of[nid]] for nid in order},
+            {nid: oy[top_of[nid]] + depth[nid] * step for nid in order})
+
+_STRATEGIES = {"horizontal": _horizontal, "radial": _radial, "lanes": _lanes}
+
+# ---- Cache ----
+# Positions depend only on tree structure, mode and spacing, so trees reloaded from
+# disk or re-selected reuse earlier results. Layouts are shared: treat them as read-only.
+class LayoutCache:
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[tuple, Layout]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tree: "SkillTree", mode: str = "classic", params: Optional[LayoutParams] = None) -> Layout:
+        p = params or LayoutParams()
+        key = (tree.index.structure_key, mode, p)
+        lay = self._items.get(key)
+        if lay is not None:
+            self.hits += 1; self._items.move_to_end(key); return lay
+        self.misses += 1
+        lay = self._items[key] = layout_tree(tree, mode, p)
+        while len(self._items) > self.maxsize: self._items.popitem(last=False)
+        return lay
+
+    def clear(self) -> None:
+        self._items.clear()
+
+LAYOUT_CACHE = LayoutCache()
+
+def cached_layout(tree: "SkillTree", mode: str = "classic", params: Optional[LayoutParams] = None) -> Layout:
+    return LAYOUT_CACHE.get(tree, mode, params)
+
+# ---- Incremental relayout ----
+# Keeps the classic frames of one tree between edits. update() compares the new
+# parent links with the previous ones; frames are redone only for nodes whose
+# parent changed, nodes that gained or lost children, and their ancestors, deepest
+# first. Everything else keeps its frame and is just translated into place.
+# Tidy mode and trees with prerequisite cycles fall back to a full layout.
+_MISSING = object()
+
+class Relayout:
+    def __init__(self, tree: "SkillTree", mode: str = "classic", params: Optional[LayoutParams] = None):
+        if mode not in MODES: raise ValueError(f"Unknown layout mode '{mode}'.")
+        self.mode = mode
+        self.params = params or LayoutParams()
+        self.recomputed = 0  # frames redone by the last update, for diagnostics
+        self._parent: Dict[str, Optional[str]] = {}
+        self._span: Dict[str, float] = {}; self._lead: Dict[str, float] = {}; self._off: Dict[str, float] = {}
+        self._frames = False
+        self.layout = self._rebuild(tree)
+
+    def _rebuild(self, tree: "SkillTree") -> Layout:
+        idx = tree.index
+        self._frames = self.mode == "classic" and not idx.cyclic
+        if not self._frames:
+            self.recomputed = len(tree.nodes); return cached_layout(tree, self.mode, self.params)
+        step = self.params.node_w + self.params.sibling_gap
+        self._span = {}; self._lead = {}; self._off = {}
+        for nid in reversed(idx.order): _classic_frame(nid, idx.children, step, self._span, self._lead, self._off)
+        self.recomputed = len(idx.order)
+        return self._finish(tree)
+
+    def _finish(self, tree: "SkillTree") -> Layout:
+        idx = tree.index; p = self.params
+        x = _classic_place(idx.order, idx.children, idx.roots + idx.orphans, p, self._span, self._lead, self._off)
+        self._parent = dict(idx.parent)
+        return _build(idx.order, x, _rows(idx.depth, p), self.mode)
+
+    def update(self, tree: "SkillTree") -> Layout:
+        idx = tree.index
+        if not self._frames or idx.cyclic:
+            self.layout = self._rebuild(tree); return self.layout
+        old, new = self._parent, idx.parent
+        starts = [nid for nid, par in new.items() if old.get(nid, _MISSING) != par]
+        starts += [old[nid] for nid in starts if old.get(nid) is not None]  # lost a child
+        for nid in old.keys() - new.keys():
+            if old[nid] is not None: starts.append(old[nid])
+            self._span.pop(nid, None); self._lead.pop(nid, None); self._off.pop(nid, None)
+        dirty = set()
+        for nid in starts:
+            while nid in new and nid not in dirty:
+                dirty.add(nid); nid = new[nid]
+        step = self.params.node_w + self.params.sibling_gap
+        for nid in sorted(dirty, key=idx.depth.__getitem__, reverse=True):
+            _classic_frame(nid, idx.children, step, self._span, self._lead, self._off)
+        self.recomputed = len(dirty)
+        self.layout = self._finish(tree)
+        return self.layout
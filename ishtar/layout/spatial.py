@@ -0,0 +1,108 @@
+from __future__ import annotations
+from array import array
+from typing import Dict, List, Sequence, Tuple
+from .engine import Layout, LayoutParams
+
+# Multi-level loose grid over axis-aligned boxes. A box goes into the finest level
+# whose cells are at least as large as the box and is filed once, under the cell
+# holding its top-left corner; a query reaches one cell further left and up to
+# catch boxes that start there. Long boxes (a bus across a wide row, a long radial
+# spoke) land on coarse levels instead of being copied into many small cells.
+# Building is O(n); a query visits only the cells under the rectangle (or, when
+# that range is larger than the level itself, the level's occupied cells).
+class GridIndex:
+    def __init__(self, cell: float = 512.0, fan: int = 16):
+        self.cell = cell
+        self.fan = fan
+        self.x0 = array("d"); self.y0 = array("d"); self.x1 = array("d"); self.y1 = array("d")
+        self._levels: List[Dict[Tuple[int, int], List[int]]] = [{}]
+
+    def __len__(self) -> int:
+        return len(self.x0)
+
+    def add(self, x0: float, y0: float, x1: float, y1: float) -> int:
+        i = len(self.x0)
+        self.extend((x0,), (y0,), (x1,), (y1,))
+        return i
+
+    def extend(self, x0s: Sequence[float], y0s: Sequence[float], x1s: Sequence[float], y1s: Sequence[float]) -> None:
+        # bulk add(); box ids continue from len(self)
+        i = len(self.x0); cell = self.cell; levels = self._levels; fine = levels[0]
+        for x0, y0, x1, y1 in zip(x0s, y0s, x1s, y1s):
+            size = x1 - x0 if x1 - x0 > y1 - y0 else y1 - y0
+            if size <= cell:
+                fine.setdefault((int(x0 // cell), int(y0 // cell)), []).append(i)
+            else:
+                lv = 0; c = cell
+                while size > c: c *= self.fan; lv += 1
+                while len(levels) <= lv: levels.append({})
+                levels[lv].setdefault((int(x0 // c), int(y0 // c)), []).append(i)
+            i += 1
+        self.x0.extend(x0s); self.y0.extend(y0s); self.x1.extend(x1s); self.y1.extend(y1s)
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> List[int]:
+        # ids of the boxes intersecting the rectangle, each once
+        out: List[int] = []; c = self.cell
+        X0, Y0, X1, Y1 = self.x0, self.y0, self.x1, self.y1
+        for cells in self._levels:
+            gx0, gx1, gy0, gy1 = int(x0 // c) - 1, int(x1 // c), int(y0 // c) - 1, int(y1 // c)
+            if (gx1 - gx0 + 1) * (gy1 - gy0 + 1) > len(cells):
+                hits = [v for (gx, gy), v in cells.items() if gx0 <= gx <= gx1 and gy0 <= gy <= gy1]
+            else:
+                hits = [cells[k] for k in ((gx, gy) for gx in range(gx0, gx1 + 1) for gy in range(gy0, gy1 + 1)) if k in cells]
+            for v in hits:
+                for i in v:
+                    if X0[i] <= x1 and X1[i] >= x0 and Y0[i] <= y1 and Y1[i] >= y0: out.append(i)
+            c *= self.fan
+        return out
+
+def node_grid(lay: Layout, p: LayoutParams = LayoutParams()) -> GridIndex:
+    # box i is layout slot i
+    g = GridIndex()
+    g.extend(lay.xs, lay.ys, array("d", (x + p.node_w for x in lay.xs)), array("d", (y + p.node_h for y in lay.ys)))
+    return g
+
+# ---- Edges as straight segments ----
+# An elbow edge runs parent -> mid line -> child. Siblings share the parent's stub
+# and one bus along the mid line, so a parent with k children costs k + 2
+# segments, and none of them is much longer than the children's spread.
+def edge_lines(lay: Layout, children: Dict[str, Sequence[str]],
+               p: LayoutParams = LayoutParams()) -> Tuple[array, array, array, array]:
+    x0 = array("d"); y0 = array("d"); x1 = array("d"); y1 = array("d")
+    ax0, ay0, ax1, ay1 = x0.append, y0.append, x1.append, y1.append
+    def seg(a, b, c, d):
+        if a != c or b != d: ax0(a); ay0(b); ax1(c); ay1(d)
+    xs, ys, slot = lay.xs, lay.ys, lay.slot
+    way = lay.orientation; w, h = p.node_w, p.node_h
+    for i, nid in enumerate(lay.ids):
+        kids = [slot[k] for k in children.get(nid, ()) if k in slot]
+        if not kids: continue
+        px, py = xs[i], ys[i]
+        if way == "radial":  # straight spokes, centre to centre
+            for k in kids: seg(px + w/2, py + h/2, xs[k] + w/2, ys[k] + h/2)
+        elif way == "right":
+            sx, sy = px + w, py + h/2
+            for k in kids:
+                if xs[k] != xs[kids[0]]: seg(sx, sy, xs[k], ys[k] + h/2)  # only across a prerequisite cycle
+            col = [k for k in kids if xs[k] == xs[kids[0]]]
+            mid = (sx + xs[col[0]]) / 2
+            cy = [ys[k] + h/2 for k in col]
+            seg(sx, sy, mid, sy); seg(mid, min(cy + [sy]), mid, max(cy + [sy]))
+            for k, y in zip(col, cy): seg(mid, y, xs[k], y)
+        else:
+            sx, sy = px + w/2, py + h
+            for k in kids:
+                if ys[k] != ys[kids[0]]: seg(sx, sy, xs[k] + w/2, ys[k])  # only across a prerequisite cycle
+            row = [k for k in kids if ys[k] == ys[kids[0]]]
+            mid = (sy + ys[row[0]]) / 2
+            cx = [xs[k] + w/2 for k in row]
+            seg(sx, sy, sx, mid); seg(min(cx + [sx]), mid, max(cx + [sx]), mid)
+            for k, x in zip(row, cx): seg(x, mid, x, ys[k])
+    return x0, y0, x1, y1
+
+def edge_grid(lines: Tuple[array, array, array, array]) -> GridIndex:
+    x0, y0, x1, y1 = lines
+    g = GridIndex()
+    g.extend(array("d", (a if a < c else c for a, c in zip(x0, x1))), array("d", (b if b < d else d for b, d in zip(y0, y1))),
+             array("d", (a if a > c else c for a, c in zip(x0, x1))), array("d", (b if b > d else d for b, d in zip(y0, y1))))
+    return g
@@ -1,16 +1,19 @@
-
 from __future__ import annotations
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Set
 from PySide6 import QtWidgets, QtCore, QtGui
 from ...core.models import SkillTree
+from ...core.topology import TreeIndex
 from .colors import ichor_color_locked, COLOR_UNLOCKED
 from ..widgets.node_item import NodeItem
+from ...layout.engine import NODE_W, NODE_H, MODES, Layout, Relayout, cached_layout
+from ...layout.spatial import GridIndex, edge_grid, edge_lines, node_grid
 
-NODE_W = 160
-NODE_H = 80
-LEVEL_V_SPACING = 130
-SIBLING_H_SPACING = 40
+POOL_MARGIN = 400  # scene px around the viewport that get live items ahead of scrolling
 
+# Virtualized: positions live in the Layout arrays and unlock states in a bytearray
+# by layout slot; NodeItems exist only for nodes within POOL_MARGIN of the viewport
+# and are recycled as it moves. Edges are not items at all but line segments drawn
+# in drawBackground, found through a grid index like the nodes.
 class TreeCanvas(QtWidgets.QGraphicsView):
     nodeSelected = QtCore.Signal(str)
     checkboxToggled = QtCore.Signal(str)
@@ -23,10 +26,22 @@ class TreeCanvas(QtWidgets.QGraphicsView):
         self.setDragMode(QtWidgets.QGraphicsView.ScrollHandDrag)
         self.setStyleSheet("background: #202124;")
 
-        self.items_by_id: Dict[str, NodeItem] = {}
-        self._edges: List[QtWidgets.QGraphicsPathItem] = []
+        self.items_by_id: Dict[str, NodeItem] = {}  # live items only, see _sync_pool()
+        self._spare: List[NodeItem] = []
+        self._tree: Optional[SkillTree] = None
         self._parents: Dict[str, Optional[str]] = {}
         self._children: Dict[str, List[str]] = {}
+        self._index: Optional[TreeIndex] = None
+        self._layout_shown: Optional[Layout] = None
+        self._relayout: Optional[Relayout] = None  # editor previews: kept between update_tree() calls
+        self._unlocked = bytearray()  # by layout slot
+        self._node_grid = GridIndex(); self._edge_grid = GridIndex()
+        self._lines = ((), (), (), ())
+        self._covered: Optional[QtCore.QRectF] = None  # scene rect the live items were picked for
+        self._sync_timer = QtCore.QTimer(self); self._sync_timer.setSingleShot(True)
+        self._sync_timer.timeout.connect(self._sync_pool)
+        self._highlight: Optional[Set[str]] = None  # hover chain, None when not hovering
+        self._edge_pen = QtGui.QPen(QtGui.QColor("#5F6368"), 2); self._edge_pen.setCapStyle(QtCore.Qt.RoundCap)
 
         self._zoom = 1.0
         self._search_hits: List[str] = []
@@ -40,6 +55,10 @@ class TreeCanvas(QtWidgets.QGraphicsView):
 
         # ichor gate preview (dim higher-rank nodes)
         self.ichor_preview_only_unlockable = False
+
+        # one of layout.engine.MODES: "classic" (leaves in one row per level), "tidy" (compact),
+        # "horizontal" (left to right), "radial" (roots in the centre), "lanes" (root subtrees packed)
+        self.layout_mode = "classic"
         self.current_char_rank = 0
 
     # ---- Zoom ----
@@ -52,128 +71,171 @@ class TreeCanvas(QtWidgets.QGraphicsView):
             self.setTransformationAnchor(QtWidgets.QGraphicsView.AnchorUnderMouse)
             self.scale(factor, factor)
             self._zoom = new_zoom
+            self._sync_if_needed()
 
     def reset_zoom(self) -> None:
         self.resetTransform(); self._zoom = 1.0
+        self._sync_if_needed()
+
+    def view_state(self) -> tuple:
+        return (self.transform(), self._zoom, self.horizontalScrollBar().value(), self.verticalScrollBar().value())
+
+    def restore_view_state(self, state: tuple) -> None:
+        tr, zoom, hx, vy = state
+        self.setTransform(tr); self._zoom = zoom
+        self.horizontalScrollBar().setValue(hx); self.verticalScrollBar().setValue(vy)
+        self._sync_if_needed()
 
     # ---- Layout helpers ----
     def _build_graph(self, tree: SkillTree):
-        self._parents = {nid: (tree.nodes[nid].prereq[0] if tree.nodes[nid].prereq else None) for nid in tree.nodes}
-        self._children = {nid: [] for nid in tree.nodes}
-        for nid, parent in self._parents.items():
-            if parent:
-                self._children[parent].append(nid)
-        for v in self._children.values():
-            v.sort()
-
-    def _roots(self, tree: SkillTree) -> List[str]:
-        return sorted([nid for nid, n in tree.nodes.items() if not n.prereq])
-
-    def _layout_positions(self, tree: SkillTree) -> Dict[str, QtCore.QPointF]:
-        children = self._children
-        roots = self._roots(tree)
-        pos: Dict[str, QtCore.QPointF] = {}
-        next_x = 0.0
-        def layout_sub(nid: str, depth: int) -> float:
-            nonlocal next_x
-            kids = children.get(nid, [])
-            if not kids:
-                x = next_x; next_x += NODE_W + SIBLING_H_SPACING
-            else:
-                xs = [layout_sub(k, depth+1) for k in kids]
-                x = sum(xs)/len(xs)
-            y = depth * (NODE_H + LEVEL_V_SPACING)
-            pos[nid] = QtCore.QPointF(x, y)
-            return x
-        for r in roots:
-            layout_sub(r, 0)
-            next_x += NODE_W
-        if pos:
-            min_x = min(p.x() for p in pos.values())
-            for k in pos:
-                pos[k].setX(pos[k].x() - min_x + 20)
-        return pos
+        self._tree = tree
+        self._index = tree.index
+        self._parents = self._index.parent
+        self._children = self._index.children
+
+    def _layout(self, tree: SkillTree) -> Layout:
+        return cached_layout(tree, self.layout_mode)
+
+    def set_layout_mode(self, mode: str) -> None:
+        if mode not in MODES: raise ValueError(f"Unknown layout mode '{mode}'.")
+        self.layout_mode = mode
 
     # ---- Build ----
     def clear_all(self):
-        self.scene().clear()
-        self.items_by_id.clear(); self._edges.clear()
+        for nid in list(self.items_by_id): self._release(nid)
+        self._tree = None; self._index = None; self._parents = {}; self._children = {}
+        self._layout_shown = None; self._relayout = None; self._unlocked = bytearray()
+        self._node_grid = GridIndex(); self._edge_grid = GridIndex(); self._lines = ((), (), (), ())
+        self._covered = None; self._highlight = None
         self._search_hits = []; self._search_idx = -1
         self._block_reasons.clear()
         self.reset_zoom()
+        self.resetCachedContent(); self.viewport().update()
 
     def load_tree(self, tree: SkillTree, unlocked: Set[str]):
         self.clear_all()
         self._build_graph(tree)
-        pos = self._layout_positions(tree)
+        lay = self._layout(tree)
+        self._unlocked = bytearray(nid in unlocked for nid in lay.ids)
+        self._show_layout(lay)
+
+    def update_tree(self, tree: SkillTree, unlocked: Set[str] = frozenset()) -> None:
+        # after an edit: new positions and edges, live items rebound in place; zoom and scroll stay put
+        if self._relayout is None or self._relayout.mode != self.layout_mode:
+            self._relayout = Relayout(tree, self.layout_mode); lay = self._relayout.layout
+        else:
+            lay = self._relayout.update(tree)
+        self._build_graph(tree)
+        self._unlocked = bytearray(nid in unlocked for nid in lay.ids)
+        nodes = tree.nodes; slot = lay.slot
+        for nid in [k for k in self.items_by_id if k not in nodes]: self._release(nid)
+        for nid, item in self.items_by_id.items():
+            i = slot[nid]
+            if item.node is not nodes[nid]: item.rebind(nodes[nid], bool(self._unlocked[i]), self._block_reasons.get(nid))
+            item.setPos(lay.xs[i], lay.ys[i])
+        self._search_hits = []; self._search_idx = -1
+        self._show_layout(lay)
+
+    def _show_layout(self, lay: Layout) -> None:
+        self._layout_shown = lay
+        self._node_grid = node_grid(lay)
+        self._lines = edge_lines(lay, self._children)
+        self._edge_grid = edge_grid(self._lines)
+        self._fit_scene_rect(lay)
+        self._covered = None; self._sync_pool()
+        self.resetCachedContent(); self.viewport().update()
+
+    def _fit_scene_rect(self, lay: Layout) -> None:
+        # node bounds plus the 1px outline and the usual margin, without asking every item
+        x0, y0, x1, y1 = lay.bounds()
+        self.scene().setSceneRect(QtCore.QRectF(QtCore.QPointF(x0, y0), QtCore.QPointF(x1, y1)).adjusted(-41, -41, 81, 81))
+
+    # ---- Item pool ----
+    def _visible_rect(self) -> QtCore.QRectF:
+        return self.mapToScene(self.viewport().rect()).boundingRect()
 
-        # nodes
-        for nid, n in tree.nodes.items():
-            item = NodeItem(n, unlocked=(nid in unlocked))
-            item.setPos(pos.get(nid, QtCore.QPointF(0, 0)))
+    def _sync_if_needed(self) -> None:
+        if self._layout_shown is None: return
+        if self._covered is None or not self._covered.contains(self._visible_rect()): self._sync_pool()
+
+    def _sync_pool(self) -> None:
+        # bind items for every node near the viewport, hand the rest back to the pool
+        self._sync_timer.stop()
+        lay = self._layout_shown
+        if lay is None: return
+        r = self._visible_rect().adjusted(-POOL_MARGIN, -POOL_MARGIN, POOL_MARGIN, POOL_MARGIN)
+        want = self._node_grid.query(r.left(), r.top(), r.right(), r.bottom())
+        ids = lay.ids; wanted = {ids[i] for i in want}
+        for nid in [k for k in self.items_by_id if k not in wanted]: self._release(nid)
+        for i in want:
+            if ids[i] not in self.items_by_id: self._bind(i)
+        self._covered = r
+
+    def _bind(self, i: int) -> NodeItem:
+        lay = self._layout_shown; nid = lay.ids[i]; node = self._tree.nodes[nid]
+        unlocked = bool(self._unlocked[i]); reason = self._block_reasons.get(nid)
+        if self._spare:
+            item = self._spare.pop(); item.rebind(node, unlocked, reason); item.setVisible(True)
+        else:
+            item = NodeItem(node, unlocked=unlocked); item.block_reason = reason
             item.selected.connect(self.nodeSelected)
             item.checkboxToggled.connect(self.checkboxToggled)
             item.hoverEntered.connect(self._on_hover_entered)
             item.hoverLeft.connect(self._on_hover_left)
             self.scene().addItem(item)
-            self.items_by_id[nid] = item
-
-        # edges
-        for nid, n in tree.nodes.items():
-            if n.prereq:
-                parent = n.prereq[0]
-                if parent in self.items_by_id:
-                    self._add_edge(self.items_by_id[parent].pos(), self.items_by_id[nid].pos())
-
-        self.scene().setSceneRect(self.scene().itemsBoundingRect().adjusted(-40, -40, 80, 80))
-
-    def _add_edge(self, p_parent, p_child) -> None:
-        parent_bottom = QtCore.QPointF(p_parent.x()+NODE_W/2, p_parent.y()+NODE_H)
-        child_top = QtCore.QPointF(p_child.x()+NODE_W/2, p_child.y())
-        mid_y = (parent_bottom.y() + child_top.y())/2
-        path = QtGui.QPainterPath(parent_bottom)
-        path.lineTo(parent_bottom.x(), mid_y)
-        path.lineTo(child_top.x(), mid_y)
-        path.lineTo(child_top)
-        item = QtWidgets.QGraphicsPathItem(path)
-        pen = QtGui.QPen(QtGui.QColor("#5F6368"), 2)
-        pen.setCapStyle(QtCore.Qt.RoundCap)
-        item.setPen(pen)
-        self.scene().addItem(item); self._edges.append(item)
+        item.setPos(lay.xs[i], lay.ys[i])
+        self.items_by_id[nid] = item
+        self._apply_dim(item)
+        return item
+
+    def _release(self, nid: str) -> None:
+        item = self.items_by_id.pop(nid)
+        item.setVisible(False); self._spare.append(item)
+
+    def scrollContentsBy(self, dx: int, dy: int) -> None:  # type: ignore[override]
+        super().scrollContentsBy(dx, dy); self._sync_if_needed()
+
+    def resizeEvent(self, e):  # type: ignore[override]
+        super().resizeEvent(e); self._sync_if_needed()
+
+    # ---- Edges ----
+    def drawBackground(self, painter: QtGui.QPainter, rect: QtCore.QRectF) -> None:  # type: ignore[override]
+        super().drawBackground(painter, rect)
+        # any other transform change (fitInView, scale from outside) is caught here
+        if not self._sync_timer.isActive() and self._layout_shown is not None and \
+                (self._covered is None or not self._covered.contains(self._visible_rect())):
+            self._sync_timer.start(0)
+        hits = self._edge_grid.query(rect.left(), rect.top(), rect.right(), rect.bottom())
+        if not hits: return
+        x0, y0, x1, y1 = self._lines
+        painter.save(); painter.setPen(self._edge_pen)
+        painter.drawLines([QtCore.QLineF(x0[i], y0[i], x1[i], y1[i]) for i in hits])
+        painter.restore()
 
     # ---- Hover highlighting ----
     def _collect_chain(self, nid: str) -> Set[str]:
-        seen: Set[str] = set()
-        # upward
-        cur = nid
-        while True:
-            p = self._parents.get(cur)
-            if not p: break
-            seen.add(p); cur = p
-        # downward
-        stack = [nid]
-        while stack:
-            u = stack.pop()
-            for c in self._children.get(u, []):
-                if c not in seen:
-                    seen.add(c); stack.append(c)
+        if self._index is None: return {nid}
+        seen = set(self._index.ancestors(nid))
+        seen.update(self._index.subtree(nid))
         seen.add(nid)
         return seen
 
     def _on_hover_entered(self, nid: str):
-        highlight = self._collect_chain(nid)
-        for k, item in self.items_by_id.items():
-            item.setOpacity(1.0 if k in highlight else 0.25)
+        self._highlight = self._collect_chain(nid)
+        for item in self.items_by_id.values():
+            self._apply_dim(item)
 
     def _on_hover_left(self):
+        self._highlight = None
         for item in self.items_by_id.values():
-            item.setOpacity(1.0)
+            self._apply_dim(item)
 
     # ---- Search ----
     def prepare_search(self, query: str):
         q = query.strip().lower()
-        self._search_hits = [nid for nid, it in self.items_by_id.items()
-                             if q and (q in it.node.id.lower() or q in it.node.name.lower())]
+        lay = self._layout_shown; nodes = self._tree.nodes if self._tree else {}
+        self._search_hits = [nid for nid in (lay.ids if lay else ())
+                             if q and (q in nid.lower() or q in nodes[nid].name.lower())]
         self._search_idx = -1
 
     def next_search_hit(self) -> Optional[str]:
@@ -184,10 +246,11 @@ class TreeCanvas(QtWidgets.QGraphicsView):
         return nid
 
     def center_on_node(self, nid: str):
-        it = self.items_by_id.get(nid); 
-        if not it: return
-        rect = it.mapToScene(it.boundingRect()).boundingRect()
+        pos = self._layout_shown.pos(nid) if self._layout_shown else None
+        if pos is None: return
+        rect = QtCore.QRectF(pos[0], pos[1], NODE_W, NODE_H)
         self.fitInView(rect.adjusted(-80, -60, 80, 60), QtCore.Qt.KeepAspectRatio)
+        self._sync_if_needed()
 
     # ---- Legend ----
     def drawForeground(self, painter: QtGui.QPainter, rect: QtCore.QRectF) -> None:  # type: ignore[override]
@@ -213,17 +276,36 @@ class TreeCanvas(QtWidgets.QGraphicsView):
         painter.restore()
 
     # ---- Block reasons from main window ----
-    def apply_block_reasons(self, reasons: Dict[str, Optional[str]]):
+    def apply_block_reasons(self, reasons: Dict[str, Optional[str]], changed: Optional[Iterable[str]] = None):
         self._block_reasons = reasons or {}
-        for nid, item in self.items_by_id.items():
-            item.set_block_reason(self._block_reasons.get(nid))
+        ids = self.items_by_id.keys() if changed is None else changed
+        for nid in ids:
+            item = self.items_by_id.get(nid)
+            if item: item.set_block_reason(self._block_reasons.get(nid))
+
+    def update_node_states(self, changed: Iterable[str], unlocked: Set[str], reasons: Dict[str, Optional[str]]):
+        # patch the state arrays after a toggle, and whichever of those nodes have live items
+        self._block_reasons = reasons
+        slot = self._layout_shown.slot if self._layout_shown else {}
+        for nid in changed:
+            i = slot.get(nid)
+            if i is not None: self._unlocked[i] = nid in unlocked
+            item = self.items_by_id.get(nid)
+            if not item: continue
+            item.unlocked = nid in unlocked
+            item.set_block_reason(reasons.get(nid))
+            self._apply_dim(item)
 
     # ---- Ichor gate preview ----
     def set_ichor_preview(self, enabled: bool, char_rank: int):
         self.ichor_preview_only_unlockable = enabled
         self.current_char_rank = char_rank
         if not self.items_by_id: return
-        for nid, item in self.items_by_id.items():
-            n = item.node
-            should_dim = enabled and (n.ichor_rank > char_rank) and not item.unlocked
-            item.setOpacity(0.35 if should_dim else 1.0)
+        for item in self.items_by_id.values():
+            self._apply_dim(item)
+
+    def _apply_dim(self, item: NodeItem):
+        if self._highlight is not None:
+            item.setOpacity(1.0 if item.node.id in self._highlight else 0.25); return
+        should_dim = self.ichor_preview_only_unlockable and (item.node.ichor_rank > self.current_char_rank) and not item.unlocked
+        item.setOpacity(0.35 if should_dim else 1.0)
@@ -34,10 +34,17 @@ class NodeItem(QtWidgets.QGraphicsObject):
         doc.setDefaultTextOption(opt)
         self.text_item.setPlainText(self.node.name)
 
-        # Tooltip
-        self.setToolTip(f"{self.node.name}\nCost: {self.node.cost}\nIchor: {self.node.ichor_rank}\n\n{self.node.description}")
+        # Tooltip is built on first hover; most descriptions are never read
+        self._tooltip_ready = False
 
     # --- API ---
+    def rebind(self, node, unlocked: bool = False, block_reason: str | None = None):
+        # reuse this item for another node (TreeCanvas recycles items as the view scrolls)
+        self.node = node; self.unlocked = unlocked; self.block_reason = block_reason
+        self.text_item.setPlainText(node.name)
+        if self._tooltip_ready: self._tooltip_ready = False; self.setToolTip("")
+        self.setSelected(False); self.update()
+
     def set_unlocked(self, v: bool):
         self.unlocked = v; self.update()
 
@@ -107,7 +114,13 @@ class NodeItem(QtWidgets.QGraphicsObject):
             self.selected.emit(self.node.id); e.accept(); return
         super().mousePressEvent(e)
 
+    def _ensure_tooltip(self):
+        if self._tooltip_ready: return
+        self._tooltip_ready = True
+        self.setToolTip(f"{self.node.name}\nCost: {self.node.cost}\nIchor: {self.node.ichor_rank}\n\n{self.node.description}")
+
     def hoverEnterEvent(self, e):  # type: ignore[override]
+        self._ensure_tooltip()
         self.hoverEntered.emit(self.node.id); super().hoverEnterEvent(e)
 
     def hoverLeaveEvent(self, e):  # type: ignore[override]
@@ -1,10 +1,13 @@
 
 from __future__ import annotations
-from typing import Dict, Optional, List, Tuple
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, List, Set
 from PySide6 import QtWidgets, QtCore
-from ...core.models import SkillTree, SkillNode, rank_to_index, rank_name
-from ...core.validation import validate_tree
+from ...core.models import SkillTree, SkillNode, rank_name
+from ...core.validation import Diagnostic, IncrementalValidator, diagnose_tree, diagnose_tree_meta, node_specs
 from ...io.storage import Storage
+from ...io.tabular import ImportBatch, RowError, export_tree, format_for, iter_import_batches
 from ..views.canvas import TreeCanvas
 
 class NodeEditorDialog(QtWidgets.QDialog):
@@ -56,17 +59,54 @@ class NodeEditorDialog(QtWidgets.QDialog):
         ichor_rank = self.dd_rank.currentIndex()
         return SkillNode(id=nid, name=name, cost=cost, description=desc, prereq=prereq, ichor_rank=ichor_rank)
 
+class _ValidationRelay(QtCore.QObject):
+    done = QtCore.Signal(int, object)  # generation, List[Diagnostic]
+
+class _ImportRelay(QtCore.QObject):
+    batch = QtCore.Signal(int, object)     # job, ImportBatch
+    finished = QtCore.Signal(int, object)  # job, fatal error message or None
+
+IMPORT_BATCHES_IN_FLIGHT = 4
+IMPORT_PREVIEW_MS = 250  # preview refresh interval while an import streams in
+
 class TreeEditorWindow(QtWidgets.QDialog):
     def __init__(self, storage: Storage, trees_by_id: Dict[str, SkillTree], parent=None):
         super().__init__(parent)
         self.storage = storage
-        self.trees_by_id = trees_by_id
+        # private map: trees are copied on first selection so unsaved edits never leak into the shared catalog
+        self.trees_by_id = dict(trees_by_id)
+        self._owned: Set[str] = set()
         self.setWindowTitle("Tree Editor / Creator")
         self.resize(1100, 680)
 
         self._undo: List[dict] = []
         self._redo: List[dict] = []
 
+        # continuous validation: one worker thread owns the validator, results come back via a queued signal
+        self._validator = IncrementalValidator()
+        self._val_pool = ThreadPoolExecutor(max_workers=1)
+        self._val_future: Optional[Future] = None
+        self._val_gen = 0
+        self._val_relay = _ValidationRelay(self)
+        self._val_relay.done.connect(self._on_validation_done)
+
+        # spreadsheet import: parsed on its own worker, applied here batch by batch
+        self._import_pool = ThreadPoolExecutor(max_workers=1)
+        self._import_job = 0
+        self._import_tid: Optional[str] = None
+        self._import_cancel = threading.Event()
+        self._import_slots = threading.Semaphore(IMPORT_BATCHES_IN_FLIGHT)
+        self._import_errors: List[RowError] = []
+        self._import_rows = 0
+        self._import_progress: Optional[QtWidgets.QProgressDialog] = None
+        self._import_relay = _ImportRelay(self)
+        self._import_relay.batch.connect(self._on_import_batch)
+        self._import_relay.finished.connect(self._on_import_finished)
+        self._import_preview = QtCore.QTimer(self); self._import_preview.setSingleShot(True)
+        self._import_preview.setInterval(IMPORT_PREVIEW_MS)
+        self._import_preview.timeout.connect(self._refresh_import_preview)
+        self._row_of: Dict[str, int] = {}
+
         main = QtWidgets.QHBoxLayout(self)
 
         # left: list + metadata
@@ -108,15 +148,20 @@ class TreeEditorWindow(QtWidgets.QDialog):
         self.btn_edit = QtWidgets.QPushButton("Edit Node")
         self.btn_remove = QtWidgets.QPushButton("Remove Node")
         self.btn_import = QtWidgets.QPushButton("Import CSV/TSV")
+        self.btn_export = QtWidgets.QPushButton("Export…")
         self.btn_undo = QtWidgets.QPushButton("Undo")
         self.btn_redo = QtWidgets.QPushButton("Redo")
         rowbtns.addWidget(self.btn_add); rowbtns.addWidget(self.btn_edit); rowbtns.addWidget(self.btn_remove)
-        rowbtns.addStretch(1); rowbtns.addWidget(self.btn_import); rowbtns.addWidget(self.btn_undo); rowbtns.addWidget(self.btn_redo)
+        rowbtns.addStretch(1); rowbtns.addWidget(self.btn_import); rowbtns.addWidget(self.btn_export); rowbtns.addWidget(self.btn_undo); rowbtns.addWidget(self.btn_redo)
         right.addLayout(rowbtns)
 
         self.preview = TreeCanvas(allow_zoom=True)
         right.addWidget(self.preview, 2)
 
+        self.lbl_diag = QtWidgets.QLabel("Diagnostics: none")
+        self.lst_diag = QtWidgets.QListWidget(); self.lst_diag.setMaximumHeight(120)
+        right.addWidget(self.lbl_diag); right.addWidget(self.lst_diag)
+
         # connections
         self.tree_list.currentItemChanged.connect(self._on_select_tree)
         self.btn_new_tree.clicked.connect(self._on_new_tree)
@@ -128,18 +173,28 @@ class TreeEditorWindow(QtWidgets.QDialog):
         self.btn_edit.clicked.connect(self._on_edit_node)
         self.btn_remove.clicked.connect(self._on_remove_node)
         self.btn_import.clicked.connect(self._on_import)
+        self.btn_export.clicked.connect(self._on_export)
         self.btn_undo.clicked.connect(self._on_undo)
         self.btn_redo.clicked.connect(self._on_redo)
+        self.lst_diag.itemDoubleClicked.connect(self._on_diag_activated)
 
         if self.tree_list.count(): self.tree_list.setCurrentRow(0)
 
     # ---- helpers ----
-    def _get_tree(self) -> Optional[SkillTree]:
+    def _shown_tid(self) -> Optional[str]:
         it = self.tree_list.currentItem()
-        tid = it.data(QtCore.Qt.UserRole) if it else None
-        return self.trees_by_id.get(tid) if tid else None
+        return it.data(QtCore.Qt.UserRole) if it else None
+
+    def _get_tree(self) -> Optional[SkillTree]:
+        tid = self._shown_tid()
+        if not tid: return None
+        t = self.trees_by_id.get(tid)
+        if t is not None and tid not in self._owned:
+            t = self.trees_by_id[tid] = t.copy(); self._owned.add(tid)
+        return t
 
     def _populate(self, tree: Optional[SkillTree]) -> None:
+        self._queue_validation(node_specs(tree) if tree else [], reset=True)
         if not tree:
             self.ed_tree_id.setText(""); self.ed_tree_name.setText(""); self.ed_tree_desc.setPlainText("")
             self.tbl.setRowCount(0); self.preview.clear_all(); return
@@ -149,12 +204,77 @@ class TreeEditorWindow(QtWidgets.QDialog):
     def _populate_table(self, tree: SkillTree) -> None:
         nodes = list(tree.nodes.values())
         self.tbl.setRowCount(len(nodes))
+        self._row_of = {}
         for r, n in enumerate(nodes):
-            vals = [n.id, n.name, str(n.cost), ",".join(n.prereq[:1]), rank_name(n.ichor_rank)]
-            for c, val in enumerate(vals):
-                it = QtWidgets.QTableWidgetItem(val)
-                if c == 0: it.setFlags(it.flags() ^ QtCore.Qt.ItemIsEditable)
-                self.tbl.setItem(r, c, it)
+            self._set_table_row(r, n)
+
+    def _set_table_row(self, r: int, n: SkillNode) -> None:
+        vals = [n.id, n.name, str(n.cost), ",".join(n.prereq[:1]), rank_name(n.ichor_rank)]
+        for c, val in enumerate(vals):
+            it = QtWidgets.QTableWidgetItem(val)
+            if c == 0: it.setFlags(it.flags() ^ QtCore.Qt.ItemIsEditable)
+            self.tbl.setItem(r, c, it)
+        self._row_of[n.id] = r
+
+    def _upsert_table_rows(self, nodes: List[SkillNode]) -> None:
+        # existing ids are rewritten in place, new ones appended in one resize
+        new = [n for n in nodes if n.id not in self._row_of]
+        self.tbl.setUpdatesEnabled(False)
+        base = self.tbl.rowCount(); self.tbl.setRowCount(base + len(new))
+        for n in nodes:
+            r = self._row_of.get(n.id)
+            if r is None: r = base; base += 1
+            self._set_table_row(r, n)
+        self.tbl.setUpdatesEnabled(True)
+
+    def _remove_table_row(self, nid: str) -> None:
+        r = self._row_of.pop(nid, None)
+        if r is None: return
+        self.tbl.removeRow(r)
+        for k, v in self._row_of.items():
+            if v > r: self._row_of[k] = v - 1
+
+    # ---- background validation ----
+    def _queue_validation(self, specs, reset: bool = False) -> None:
+        if reset: self._val_gen += 1
+        gen = self._val_gen; v = self._validator; relay = self._val_relay
+        def job():
+            if reset: v.reset(specs)
+            else: v.apply(specs)
+            relay.done.emit(gen, v.diagnostics())
+        self._val_future = self._val_pool.submit(job)
+
+    def _validate_nodes(self, t: SkillTree, ids: Iterable[str]) -> None:
+        self._queue_validation(node_specs(t, list(ids)))
+
+    def _on_validation_done(self, gen: int, diags: List[Diagnostic]) -> None:
+        if gen != self._val_gen: return
+        self.lbl_diag.setText(f"Diagnostics: {len(diags)} problem(s)" if diags else "Diagnostics: none")
+        self.lst_diag.clear()
+        for d in diags[:500]:
+            it = QtWidgets.QListWidgetItem(d.message); it.setData(QtCore.Qt.UserRole, d.node_id)
+            self.lst_diag.addItem(it)
+
+    def _on_diag_activated(self, it: QtWidgets.QListWidgetItem) -> None:
+        nid = it.data(QtCore.Qt.UserRole)
+        if not nid: return
+        for r in range(self.tbl.rowCount()):
+            if self.tbl.item(r, 0).text() == nid:
+                self.tbl.selectRow(r); self.preview.center_on_node(nid); return
+
+    def _current_diagnostics(self, t: SkillTree) -> List[Diagnostic]:
+        # the worker has normally finished long before the user hits Save
+        try:
+            if self._val_future: self._val_future.result()
+            return diagnose_tree_meta(t) + self._validator.diagnostics()
+        except Exception:
+            return diagnose_tree(t)
+
+    def done(self, r: int) -> None:  # type: ignore[override]
+        self._cancel_import()
+        self._import_pool.shutdown(wait=False)
+        self._val_pool.shutdown(wait=False)
+        super().done(r)
 
     # ---- actions ----
     def _on_select_tree(self):
@@ -164,7 +284,7 @@ class TreeEditorWindow(QtWidgets.QDialog):
         t = SkillTree(id="new_tree", name="New Tree", description="", nodes={})
         base = t.id; idx = 1
         while t.id in self.trees_by_id: t.id = f"{base}_{idx}"; idx += 1
-        self.trees_by_id[t.id] = t
+        self.trees_by_id[t.id] = t; self._owned.add(t.id)
         it = QtWidgets.QListWidgetItem(f"{t.name} ({t.id})"); it.setData(QtCore.Qt.UserRole, t.id)
         self.tree_list.addItem(it); self.tree_list.setCurrentItem(it)
         self._snapshot()
@@ -177,7 +297,7 @@ class TreeEditorWindow(QtWidgets.QDialog):
         t.nodes["a3"] = SkillNode("a3","A3",4,"",["a2"],2)
         t.nodes["root_b"] = SkillNode("root_b","Root B",2,"",[],0)
         t.nodes["b2"] = SkillNode("b2","B2",3,"",["root_b"],1)
-        self.trees_by_id[t.id] = t
+        self.trees_by_id[t.id] = t; self._owned.add(t.id)
         it = QtWidgets.QListWidgetItem(f"{t.name} ({t.id})"); it.setData(QtCore.Qt.UserRole, t.id)
         self.tree_list.addItem(it); self.tree_list.setCurrentItem(it)
         self._snapshot()
@@ -190,7 +310,7 @@ class TreeEditorWindow(QtWidgets.QDialog):
         base = f"{t.id}_copy"; i = 1
         while f"{base}_{i}" in self.trees_by_id: i += 1
         t.id = f"{base}_{i}"; t.name = f"{t.name} (Copy)"
-        self.trees_by_id[t.id] = t
+        self.trees_by_id[t.id] = t; self._owned.add(t.id)
         it = QtWidgets.QListWidgetItem(f"{t.name} ({t.id})"); it.setData(QtCore.Qt.UserRole, t.id)
         self.tree_list.addItem(it); self.tree_list.setCurrentItem(it)
         self._snapshot()
@@ -212,9 +332,10 @@ class TreeEditorWindow(QtWidgets.QDialog):
         t.id = self.ed_tree_id.text().strip() or t.id
         t.name = self.ed_tree_name.text().strip() or t.id
         t.description = self.ed_tree_desc.toPlainText().strip()
-        ok, errs = validate_tree(t)
-        if not ok:
-            QtWidgets.QMessageBox.critical(self, "Validation failed", "\n".join(errs)); return
+        errs = [d.message for d in self._current_diagnostics(t)]
+        if errs:
+            more = f"\n… and {len(errs) - 50} more" if len(errs) > 50 else ""
+            QtWidgets.QMessageBox.critical(self, "Validation failed", "\n".join(errs[:50]) + more); return
         self.storage.save_tree(t)
         it = self.tree_list.currentItem()
         if it: it.setText(f"{t.name} ({t.id})"); it.setData(QtCore.Qt.UserRole, t.id)
@@ -229,7 +350,8 @@ class TreeEditorWindow(QtWidgets.QDialog):
             if not n: return
             if n.id in t.nodes:
                 QtWidgets.QMessageBox.warning(self, "Exists", "Node id already exists."); return
-            t.nodes[n.id] = n; self._populate_table(t); self.preview.load_tree(t, set()); self._snapshot()
+            t.nodes[n.id] = n; t.touch(); self._validate_nodes(t, [n.id])
+            self._upsert_table_rows([n]); self.preview.update_tree(t); self._snapshot()
 
     def _on_edit_node(self):
         t = self._get_tree()
@@ -241,7 +363,8 @@ class TreeEditorWindow(QtWidgets.QDialog):
         if dlg.exec() == QtWidgets.QDialog.Accepted:
             n = dlg.result_node(); 
             if not n: return
-            t.nodes[n.id] = n; self._populate_table(t); self.preview.load_tree(t, set()); self._snapshot()
+            t.nodes[n.id] = n; t.touch(); self._validate_nodes(t, [n.id])
+            self._upsert_table_rows([n]); self.preview.update_tree(t); self._snapshot()
 
     def _on_remove_node(self):
         t = self._get_tree()
@@ -251,34 +374,92 @@ class TreeEditorWindow(QtWidgets.QDialog):
         nid = self.tbl.item(row, 0).text()
         if QtWidgets.QMessageBox.question(self, "Remove", f"Remove node '{nid}'?") != QtWidgets.QMessageBox.Yes: return
         t.nodes.pop(nid, None)
-        for v in t.nodes.values():
-            if nid in v.prereq: v.prereq.remove(nid)
-        self._populate_table(t); self.preview.load_tree(t, set()); self._snapshot()
+        # every dependent, not only the ones hanging off nid as their first prereq
+        deps = [v for v in t.nodes.values() if nid in v.prereq]
+        for v in deps: v.prereq[:] = [p for p in v.prereq if p != nid]
+        t.touch(); self._validate_nodes(t, [nid] + [v.id for v in deps])
+        self._remove_table_row(nid); self._upsert_table_rows(deps)
+        self.preview.update_tree(t); self._snapshot()
 
     def _on_import(self):
         t = self._get_tree()
         if not t: return
-        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Import CSV/TSV", "", "CSV/TSV (*.csv *.tsv *.txt)")
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Import CSV/TSV", "", "CSV/TSV/JSONL (*.csv *.tsv *.txt *.jsonl)")
+        if not path: return
+        self._start_import(t, path)
+
+    def _on_export(self):
+        t = self._get_tree()
+        if not t: return
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Tree", f"{t.id}.csv",
+                                                        "CSV (*.csv);;TSV (*.tsv);;JSON Lines (*.jsonl)")
         if not path: return
-        # detect delimiter
-        with open(path, "r", encoding="utf-8") as f:
-            lines = [l.strip("\n") for l in f.readlines() if l.strip()]
-        if not lines: return
-        sample = lines[0]
-        delim = ","
-        if "\t" in sample: delim = "\t"
-        elif ";" in sample: delim = ";"
-        # parse
-        for line in lines[1:] if any(h in sample.lower() for h in ["id","name","cost"]) else lines:
-            parts = line.split(delim)
-            if len(parts) < 3: continue
-            idv = parts[0].strip(); name = parts[1].strip() or idv
-            cost = int(parts[2].strip() or "0")
-            prereq = [parts[3].strip()] if len(parts) > 3 and parts[3].strip() else []
-            ichor = rank_to_index(parts[4].strip()) if len(parts) > 4 else 0
-            desc = parts[5].strip() if len(parts) > 5 else ""
-            t.nodes[idv] = SkillNode(id=idv, name=name, cost=cost, description=desc, prereq=prereq, ichor_rank=ichor)
-        self._populate_table(t); self.preview.load_tree(t, set()); self._snapshot()
+        try: n = export_tree(t, path, format_for(path))
+        except (OSError, ValueError) as e:
+            QtWidgets.QMessageBox.critical(self, "Export failed", str(e)); return
+        QtWidgets.QMessageBox.information(self, "Exported", f"{n} node(s) written.")
+
+    def _cancel_import(self) -> None:
+        self._import_cancel.set(); self._import_job += 1
+        for _ in range(IMPORT_BATCHES_IN_FLIGHT): self._import_slots.release()  # unblock a waiting worker
+
+    def _start_import(self, t: SkillTree, path: str) -> None:
+        self._cancel_import(); job = self._import_job
+        self._import_tid = t.id; self._import_errors = []; self._import_rows = 0
+        self._import_cancel = cancel = threading.Event()
+        self._import_slots = slots = threading.Semaphore(IMPORT_BATCHES_IN_FLIGHT)
+        dlg = self._import_progress = QtWidgets.QProgressDialog("Importing…", "Cancel", 0, 1000, self)
+        dlg.setWindowTitle("Import CSV/TSV"); dlg.setWindowModality(QtCore.Qt.WindowModal); dlg.setMinimumDuration(300)
+        dlg.canceled.connect(cancel.set)
+        relay = self._import_relay
+        def work():
+            try:
+                for b in iter_import_batches(path, cancel=cancel):
+                    slots.acquire()  # at most a few parsed batches wait for the GUI
+                    if cancel.is_set(): break
+                    relay.batch.emit(job, b)
+                relay.finished.emit(job, None)
+            except Exception as e:
+                relay.finished.emit(job, f"{type(e).__name__}: {e}")
+        self._import_pool.submit(work)
+
+    def _on_import_batch(self, job: int, b: ImportBatch) -> None:
+        if job != self._import_job: return
+        t = self.trees_by_id.get(self._import_tid)
+        if t is None: self._import_slots.release(); return
+        # nodes always go to the tree the import started on; table, validation and preview
+        # follow only while that tree is shown (switching back repopulates them)
+        for n in b.nodes: t.nodes[n.id] = n
+        t.touch()
+        if self._shown_tid() == self._import_tid:
+            self._validate_nodes(t, [n.id for n in b.nodes])
+            self._upsert_table_rows(b.nodes)
+            if not self._import_preview.isActive(): self._import_preview.start()
+        self._import_rows += len(b.nodes); self._import_errors.extend(b.errors)
+        dlg = self._import_progress
+        if dlg:
+            dlg.setValue(min(999, int(b.bytes_read * 1000 / b.total_bytes)) if b.total_bytes else 0)
+            dlg.setLabelText(f"{self._import_rows} node(s) imported, {len(self._import_errors)} row error(s)")
+        # released last: a modal progress dialog processes events in setValue(), so this bounds nesting
+        self._import_slots.release()
+
+    def _on_import_finished(self, job: int, error: Optional[str]) -> None:
+        if job != self._import_job: return
+        if self._import_progress: self._import_progress.reset(); self._import_progress = None
+        self._import_preview.stop()
+        if self._shown_tid() == self._import_tid:
+            self._refresh_import_preview()
+            if self._import_rows: self._snapshot()
+        problems = [f"Line {e.line}: {e.message}" for e in self._import_errors]
+        if error: problems.insert(0, f"Import stopped: {error}")
+        if problems:
+            more = f"\n… and {len(problems) - 50} more" if len(problems) > 50 else ""
+            QtWidgets.QMessageBox.warning(self, "Import",
+                f"{self._import_rows} node(s) imported.\n\n" + "\n".join(problems[:50]) + more)
+
+    def _refresh_import_preview(self) -> None:
+        t = self.trees_by_id.get(self._import_tid)
+        if t is not None and self._shown_tid() == self._import_tid: self.preview.update_tree(t)
 
     # ---- undo/redo ----
     def _snapshot(self):
@@ -291,7 +472,7 @@ class TreeEditorWindow(QtWidgets.QDialog):
         if not t: return
         tid = t.id
         new_t = SkillTree.from_dict(data)
-        self.trees_by_id[tid] = new_t
+        self.trees_by_id[tid] = new_t; self._owned.add(tid)
         self._populate(new_t)
 
     def _on_undo(self):
@@ -1,10 +1,15 @@
 from __future__ import annotations
-import json
+from collections import OrderedDict
 from typing import Dict, Optional, Set
 from pathlib import Path
 from PySide6 import QtWidgets, QtCore, QtGui
 from ...core.models import Character, SkillTree, rank_name
+from ...core.blocking import BlockEngine
+from ...core.bitset import UnlockBits
 from ...io.storage import Storage
+from ...io.autosave import Autosaver
+from ...io.catalog import CatalogDelta
+from ...io.watcher import TreeWatcher
 from ..views.canvas import TreeCanvas
 
 def apply_dark_palette(app: QtWidgets.QApplication, high_contrast: bool=False) -> None:
@@ -36,6 +41,11 @@ def apply_dark_palette(app: QtWidgets.QApplication, high_contrast: bool=False) -
         pal.setColor(QtGui.QPalette.HighlightedText, QtCore.Qt.black)
     app.setPalette(pal)
 
+PIXMAP_CACHE_SIZE = 32
+# View > Tree Layout entries, one per layout.engine mode
+LAYOUT_LABELS = {"classic": "Top Down", "tidy": "Compact", "horizontal": "Left to Right",
+                 "radial": "Radial", "lanes": "Packed Roots"}
+
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self, storage: Storage):
         super().__init__()
@@ -47,11 +57,19 @@ class MainWindow(QtWidgets.QMainWindow):
         self.resize(1280, 860)
 
         self._planned_mode = False
-        self._planned_unlocked: Dict[str, Set[str]] = {}
+        self._planned_unlocked: Dict[str, UnlockBits] = {}  # planning overlay, tree id -> bits
+        self._blocks: Optional[BlockEngine] = None
+        self._selected_node: Optional[str] = None
+        self._autosaver = Autosaver(self.storage)
+        self._watcher = TreeWatcher(self.storage, parent=self)
+        self._watcher.treesChanged.connect(self._apply_tree_delta)
+        self._pixmaps: "OrderedDict[tuple, QtGui.QPixmap]" = OrderedDict()
 
         self._build_ui()
         self._reload_all()
+        self._report_tree_errors()
         self._start_autosave_timer()
+        self.storage.thumbs.generate_async(self.storage.character_images())
 
     # ---- UI ----
     def _build_ui(self) -> None:
@@ -122,9 +140,10 @@ class MainWindow(QtWidgets.QMainWindow):
         sr = QtWidgets.QHBoxLayout()
         self.search_edit = QtWidgets.QLineEdit(); self.search_edit.setPlaceholderText("Search (Ctrl+F)…")
         self.btn_search_next = QtWidgets.QPushButton("Next")
+        self.btn_unlock_path = QtWidgets.QPushButton("Unlock Path"); self.btn_unlock_path.setToolTip("Unlock the selected skill and every missing prerequisite")
         self.btn_zoom_out = QtWidgets.QPushButton("−"); self.btn_zoom_in = QtWidgets.QPushButton("+"); self.btn_zoom_reset = QtWidgets.QPushButton("Reset")
         for b in (self.btn_zoom_out, self.btn_zoom_in, self.btn_zoom_reset): b.setFixedWidth(60)
-        sr.addWidget(self.search_edit, 1); sr.addWidget(self.btn_search_next)
+        sr.addWidget(self.search_edit, 1); sr.addWidget(self.btn_search_next); sr.addWidget(self.btn_unlock_path)
         sr.addStretch(1); sr.addWidget(self.btn_zoom_out); sr.addWidget(self.btn_zoom_in); sr.addWidget(self.btn_zoom_reset)
         right.addLayout(sr, 0)
 
@@ -143,16 +162,29 @@ class MainWindow(QtWidgets.QMainWindow):
         m = self.menuBar().addMenu("&File")
         self.act_export = m.addAction("Export Character…")
         self.act_import = m.addAction("Import Character…")
+        m.addSeparator()
+        self.act_export_campaign = m.addAction("Export Campaign…")
+        self.act_import_campaign = m.addAction("Import Campaign…")
         m.addSeparator(); m.addAction("Quit").triggered.connect(self.close)
 
         tools = self.menuBar().addMenu("&Tools")
         self.act_editor = tools.addAction("Tree Editor / Creator")
+        self.act_optimize = tools.addAction("Optimize XP Budget…")
 
         view = self.menuBar().addMenu("&View")
         self.act_font_small = view.addAction("Font: Small")
         self.act_font_default = view.addAction("Font: Default")
         self.act_font_large = view.addAction("Font: Large")
         self.act_high_contrast = view.addAction("High Contrast Theme"); self.act_high_contrast.setCheckable(True)
+        view.addSeparator()
+        layout_menu = view.addMenu("Tree Layout")
+        self._layout_group = QtGui.QActionGroup(self); self._layout_group.setExclusive(True)
+        self.layout_actions: Dict[str, QtGui.QAction] = {}
+        for mode, label in LAYOUT_LABELS.items():
+            a = layout_menu.addAction(label); a.setCheckable(True); a.setData(mode)
+            self._layout_group.addAction(a); self.layout_actions[mode] = a
+        self.layout_actions["classic"].setChecked(True)
+        self.act_live_reload = view.addAction("Live Reload Trees"); self.act_live_reload.setCheckable(True)
 
         self._apply_styles()
 
@@ -173,6 +205,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.canvas.nodeSelected.connect(self._on_node_selected)
         self.canvas.checkboxToggled.connect(self._on_checkbox_toggled)
+        self.btn_unlock_path.clicked.connect(self._on_unlock_path)
 
         self.btn_zoom_in.clicked.connect(lambda: self._zoom_buttons(+1))
         self.btn_zoom_out.clicked.connect(lambda: self._zoom_buttons(-1))
@@ -192,11 +225,16 @@ class MainWindow(QtWidgets.QMainWindow):
         self.act_font_default.triggered.connect(lambda: self._set_font_size(11))
         self.act_font_large.triggered.connect(lambda: self._set_font_size(13))
         self.act_high_contrast.toggled.connect(self._toggle_high_contrast)
+        self.act_live_reload.toggled.connect(self._toggle_live_reload)
+        self._layout_group.triggered.connect(self._on_layout_chosen)
 
         # Export / Import
         self.act_export.triggered.connect(self._on_export_character)
         self.act_import.triggered.connect(self._on_import_character)
+        self.act_export_campaign.triggered.connect(self._on_export_campaign)
+        self.act_import_campaign.triggered.connect(self._on_import_campaign)
         self.act_editor.triggered.connect(self._open_editor)
+        self.act_optimize.triggered.connect(self._on_optimize_budget)
 
     def _apply_styles(self) -> None:
         self.setStyleSheet("""
@@ -217,18 +255,29 @@ class MainWindow(QtWidgets.QMainWindow):
     # ---- data reload ----
     def _reload_all(self) -> None:
         self.trees_by_id = self.storage.load_trees()
-        self.cmb_tree.blockSignals(True); self.cmb_tree.clear()
-        for tid, t in sorted(self.trees_by_id.items(), key=lambda kv: kv[1].name.lower()):
-            self.cmb_tree.addItem(f"{t.name} ({tid})", tid)
-        self.cmb_tree.blockSignals(False)
+        self._fill_tree_combo()
 
         self.cmb_char.blockSignals(True); self.cmb_char.clear()
-        for name in self.storage.list_characters():
-            self.cmb_char.addItem(name, name)
+        for e in self.storage.character_roster():
+            self.cmb_char.addItem(e.name, e.name)
+            self.cmb_char.setItemData(self.cmb_char.count() - 1,
+                f"{rank_name(e.ichor_rank)} — {e.spent}/{e.xp_pool} XP spent, {len(e.trees)} tree(s)", QtCore.Qt.ToolTipRole)
         self.cmb_char.blockSignals(False)
         if self.cmb_char.count(): self.cmb_char.setCurrentIndex(0)
         else: self.current_char = None; self._update_ui()
 
+    def _fill_tree_combo(self) -> None:
+        self.cmb_tree.blockSignals(True); self.cmb_tree.clear()
+        for tid, t in sorted(self.trees_by_id.items(), key=lambda kv: kv[1].name.lower()):
+            self.cmb_tree.addItem(f"{t.name} ({tid})", tid)
+        self.cmb_tree.blockSignals(False)
+
+    def _report_tree_errors(self) -> None:
+        errs = self.storage.tree_load_errors()
+        if not errs: self.statusBar().clearMessage(); self.statusBar().setToolTip(""); return
+        self.statusBar().showMessage(f"{len(errs)} tree file(s) failed to load")
+        self.statusBar().setToolTip("\n".join(f"{e.path.name}: {e.message}" for e in errs[:50]))
+
     def _update_ui(self) -> None:
         if not self.current_char:
             self.sp_xp.setValue(0); self.lst_trees.clear(); self.canvas.clear_all()
@@ -242,9 +291,7 @@ class MainWindow(QtWidgets.QMainWindow):
         for tid in self.current_char.trees:
             t = self.trees_by_id.get(tid); 
             if not t: continue
-            spent = self.current_char.xp_spent_for_tree(t)
-            n_nodes = len(self.current_char.unlocked.get(tid, set()))
-            it = QtWidgets.QListWidgetItem(f"{t.name} ({tid}) — {n_nodes} nodes, {spent} XP")
+            it = QtWidgets.QListWidgetItem(self._tree_row_text(t))
             it.setData(QtCore.Qt.UserRole, tid)
             self.lst_trees.addItem(it)
 
@@ -252,6 +299,18 @@ class MainWindow(QtWidgets.QMainWindow):
         self._set_char_image(self.storage.character_image_path(self.current_char))
         self._update_xp_labels()
 
+    def _tree_row_text(self, t: SkillTree) -> str:
+        spent = self.current_char.xp_spent_for_tree(t)
+        n_nodes = len(self.current_char.unlocked.get(t.id, set()))
+        return f"{t.name} ({t.id}) — {n_nodes} nodes, {spent} XP"
+
+    def _update_tree_row(self, tid: str) -> None:
+        t = self.trees_by_id.get(tid)
+        if not (t and self.current_char): return
+        for r in range(self.lst_trees.count()):
+            it = self.lst_trees.item(r)
+            if it.data(QtCore.Qt.UserRole) == tid: it.setText(self._tree_row_text(t))
+
     def _update_xp_labels(self) -> None:
         if not self.current_char: self.lbl_xp.setText("Spent: 0  |  Remaining: 0"); return
         spent = self.current_char.xp_spent_total(self.trees_by_id); rem = self.current_char.xp_pool - spent
@@ -263,18 +322,28 @@ class MainWindow(QtWidgets.QMainWindow):
     def _on_select_char(self):
         name = self.cmb_char.currentData()
         if not name: self.current_char=None; self._update_ui(); return
-        self.current_char = self.storage.load_character(name); self._update_ui()
+        self.current_char = self.storage.load_character(name)
+        if self._autosaver.recoverable(name):
+            ans = QtWidgets.QMessageBox.question(self, "Restore Autosave",
+                f"An autosave of '{name}' newer than the saved character was found.\nRestore it?")
+            draft = self._autosaver.recover(name) if ans == QtWidgets.QMessageBox.Yes else None
+            if draft: self.current_char = draft
+            else: self._autosaver.discard(name)
+        self._update_ui()
 
     def _on_select_char_tree(self):
         if not self.current_char: return
         it = self.lst_trees.currentItem()
+        self._blocks = None
         if not it: self.canvas.clear_all(); return
         tid = it.data(QtCore.Qt.UserRole)
         self.current_tree = self.trees_by_id.get(tid)
         if self.current_tree:
             unlocked = self._get_unlocked_for_view(tid)
+            self._use_tree_layout(tid)
             self.canvas.load_tree(self.current_tree, unlocked)
-            self._refresh_block_reasons()
+            self._blocks = BlockEngine(self.current_tree, unlocked, self.current_char.ichor_rank)
+            self.canvas.apply_block_reasons(self._blocks.reasons)
             self.canvas.set_ichor_preview(self.chk_gate.isChecked(), self.current_char.ichor_rank)
             self.detail_view.setMarkdown("**Select a skill to see details.**")
 
@@ -291,6 +360,7 @@ class MainWindow(QtWidgets.QMainWindow):
     def _on_save_char(self):
         if not self.current_char: return
         self.storage.save_character(self.current_char)
+        self._autosaver.mark_saved(self.current_char)
 
     def _on_set_image(self):
         if not self.current_char: return
@@ -299,9 +369,20 @@ class MainWindow(QtWidgets.QMainWindow):
         self.storage.set_character_image(self.current_char, Path(path))
         self._set_char_image(self.storage.character_image_path(self.current_char))
 
+    def _portrait_pixmap(self, p: Path) -> QtGui.QPixmap:
+        # nearest cached thumbnail instead of the full-size upload; decoded pixmaps kept in a small LRU
+        edge = int(max(self.lbl_img.width(), self.lbl_img.height()) * self.devicePixelRatioF())
+        src = self.storage.thumbs.nearest(p, edge) or p
+        st = src.stat(); key = (str(src), st.st_mtime_ns)
+        pm = self._pixmaps.get(key)
+        if pm is not None: self._pixmaps.move_to_end(key); return pm
+        pm = QtGui.QPixmap(str(src)); self._pixmaps[key] = pm
+        while len(self._pixmaps) > PIXMAP_CACHE_SIZE: self._pixmaps.popitem(last=False)
+        return pm
+
     def _set_char_image(self, p: Optional[Path]):
         if not p: self.lbl_img.setPixmap(QtGui.QPixmap()); self.lbl_img.setText("No Image"); return
-        pm = QtGui.QPixmap(str(p))
+        pm = self._portrait_pixmap(p)
         if pm.isNull(): self.lbl_img.setText("No Image"); return
         self.lbl_img.setText("")
         self.lbl_img.setPixmap(pm.scaled(self.lbl_img.size(), QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation))
@@ -322,7 +403,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if not tid: return
         if tid in self.current_char.trees:
             QtWidgets.QMessageBox.information(self, "Info", "Tree already added to character."); return
-        self.current_char.trees.append(tid); self.current_char.unlocked.setdefault(tid, set())
+        self.current_char.trees.append(tid); self.current_char.unlocked.setdefault(tid, set()); self.current_char.mark_dirty()
         self._update_ui()
 
     def _on_remove_tree_from_char(self):
@@ -331,23 +412,87 @@ class MainWindow(QtWidgets.QMainWindow):
         if not it: return
         tid = it.data(QtCore.Qt.UserRole)
         if QtWidgets.QMessageBox.question(self, "Remove Tree", f"Remove '{tid}' from character?") == QtWidgets.QMessageBox.Yes:
-            if tid in self.current_char.trees: self.current_char.trees.remove(tid)
+            if tid in self.current_char.trees: self.current_char.trees.remove(tid); self.current_char.mark_dirty()
             self._update_ui()
 
     def _on_refresh_trees(self):
-        self.trees_by_id = self.storage.load_trees()
-        self.cmb_tree.blockSignals(True); self.cmb_tree.clear()
-        for tid, t in sorted(self.trees_by_id.items(), key=lambda kv: kv[1].name.lower()):
-            self.cmb_tree.addItem(f"{t.name} ({tid})", tid)
+        self._apply_tree_delta(self.storage.refresh_trees())
+
+    def _on_layout_chosen(self, act: QtGui.QAction):
+        # remembered per tree; trees without a saved choice open top-down
+        mode = act.data()
+        if self.current_tree: self.storage.set_layout_mode(self.current_tree.id, mode)
+        if mode == self.canvas.layout_mode: return
+        self.canvas.set_layout_mode(mode)
+        if self.current_tree: self._on_select_char_tree()
+
+    def _use_tree_layout(self, tid: str) -> None:
+        mode = self.storage.layout_mode(tid)
+        if mode not in self.layout_actions: mode = "classic"
+        self.canvas.set_layout_mode(mode); self.layout_actions[mode].setChecked(True)
+
+    def _toggle_live_reload(self, on: bool):
+        if on: self._watcher.start(); self._watcher.check()
+        else: self._watcher.stop()
+
+    def _apply_tree_delta(self, delta: CatalogDelta):
+        # patch only what the delta touches: combo entries, character tree rows, and the
+        # open canvas (reloaded in place with the same zoom and scroll position)
+        self._report_tree_errors()
+        if not delta: return
+        self.trees_by_id = self.storage.catalog.trees()
+        self._patch_tree_combo(delta)
+        if not self.current_char: return
+        mine = delta.ids & set(self.current_char.trees)
+        if not mine: return
+        rows = {self.lst_trees.item(r).data(QtCore.Qt.UserRole): r for r in range(self.lst_trees.count())}
+        for tid in sorted(mine & delta.removed, key=lambda t: -rows.get(t, -1)):
+            if tid in rows: self.lst_trees.takeItem(rows[tid])
+        for tid in mine - delta.removed:
+            if tid in rows: self._update_tree_row(tid); continue
+            pos = sum(1 for o in self.current_char.trees[:self.current_char.trees.index(tid)] if o in self.trees_by_id)
+            it = QtWidgets.QListWidgetItem(self._tree_row_text(self.trees_by_id[tid])); it.setData(QtCore.Qt.UserRole, tid)
+            self.lst_trees.insertItem(pos, it)
+        if self.current_tree and self.current_tree.id in mine:
+            if self.current_tree.id in delta.removed or not self.lst_trees.currentItem():
+                self.current_tree = None; self._on_select_char_tree()
+            else:
+                self._reload_current_tree()
+        self._update_xp_labels()
+
+    def _patch_tree_combo(self, delta: CatalogDelta) -> None:
+        self.cmb_tree.blockSignals(True)
+        for tid in delta.removed:
+            i = self.cmb_tree.findData(tid)
+            if i >= 0: self.cmb_tree.removeItem(i)
+        for tid in delta.changed | delta.added:
+            t = self.trees_by_id[tid]; i = self.cmb_tree.findData(tid)
+            if i >= 0: self.cmb_tree.removeItem(i)
+            key = t.name.lower(); pos = 0
+            while pos < self.cmb_tree.count() and self.trees_by_id[self.cmb_tree.itemData(pos)].name.lower() <= key: pos += 1
+            self.cmb_tree.insertItem(pos, f"{t.name} ({tid})", tid)
         self.cmb_tree.blockSignals(False)
-        self._update_ui()
+
+    def _reload_current_tree(self) -> None:
+        tid = self.current_tree.id
+        state = self.canvas.view_state()
+        self.current_tree = self.trees_by_id[tid]
+        unlocked = self._get_unlocked_for_view(tid)
+        self.canvas.load_tree(self.current_tree, unlocked)
+        self._blocks = BlockEngine(self.current_tree, unlocked, self.current_char.ichor_rank)
+        self.canvas.apply_block_reasons(self._blocks.reasons)
+        self.canvas.set_ichor_preview(self.chk_gate.isChecked(), self.current_char.ichor_rank)
+        self.canvas.restore_view_state(state)
+        if self._selected_node and self._selected_node in self.current_tree.nodes:
+            self._on_node_selected(self._selected_node)
 
     def _on_node_selected(self, node_id: str):
         if not (self.current_char and self.current_tree): return
         n = self.current_tree.nodes.get(node_id); 
         if not n: return
+        self._selected_node = node_id
 
-        have = self._get_unlocked_for_view(self.current_tree.id)
+        have = self._blocks.unlocked if self._blocks else self._get_unlocked_for_view(self.current_tree.id)
         has_prereq = (not n.prereq) or (n.prereq[0] in have)
         has_rank = (self.current_char.ichor_rank >= n.ichor_rank)
 
@@ -364,46 +509,101 @@ class MainWindow(QtWidgets.QMainWindow):
     def _on_checkbox_toggled(self, node_id: str):
         if not (self.current_char and self.current_tree): return
         tid = self.current_tree.id
-        have = self._get_unlocked_for_view(tid)
+        have = self._blocks.unlocked if self._blocks else self._get_unlocked_for_view(tid)
         if node_id in have:
             # lock
             if self._planned_mode:
-                self._planned_unlocked[tid].discard(node_id)
+                self._plan_bits(tid).discard(node_id)
             else:
                 self.current_char.lock(self.current_tree, node_id)
-            self._post_toggle()
+            self._post_toggle(node_id)
             return
         # unlock (XP allowed negative; can_unlock checks rank/prereq)
         ok, msg = self.current_char.can_unlock(self.current_tree, node_id, self.trees_by_id)
         if not ok and not self._planned_mode:
             QtWidgets.QMessageBox.warning(self, "Cannot Unlock", msg); return
         if self._planned_mode:
-            self._planned_unlocked[tid].add(node_id)
+            self._plan_bits(tid).add(node_id)
         else:
             self.current_char.unlock(self.current_tree, node_id)
-        self._post_toggle()
+        self._post_toggle(node_id)
 
-    def _post_toggle(self):
-        # reload current tree view state and update labels
-        it = self.lst_trees.currentItem()
-        if it: self._on_select_char_tree()
+    def _on_unlock_path(self):
+        if not (self.current_char and self.current_tree and self._selected_node): return
+        tid = self.current_tree.id
+        have = self._blocks.unlocked if self._blocks else self._get_unlocked_for_view(tid)
+        from ...core.planner import plan_unlock
+        plan = plan_unlock(self.current_tree, have, self._selected_node)
+        if plan.blocked:
+            QtWidgets.QMessageBox.warning(self, "Cannot Unlock", plan.blocked); return
+        if not plan.nodes:
+            QtWidgets.QMessageBox.information(self, "Unlock Path", "Already unlocked."); return
+        reason = plan.rank_reason(self.current_char.ichor_rank)
+        if reason and not self._planned_mode:
+            QtWidgets.QMessageBox.warning(self, "Cannot Unlock", reason); return
+        msg = f"Unlock {len(plan.nodes)} skill(s) for {plan.xp} XP?\nHighest Ichor Rank needed: {rank_name(plan.max_rank)}"
+        if QtWidgets.QMessageBox.question(self, "Unlock Path", msg) != QtWidgets.QMessageBox.Yes: return
+        if self._planned_mode:
+            self._plan_bits(tid).update(plan.nodes)
+        else:
+            ok, why = self.current_char.apply_plan(self.current_tree, plan)
+            if not ok: QtWidgets.QMessageBox.warning(self, "Cannot Unlock", why); return
+        self._post_toggle(*plan.nodes)
+        self._on_node_selected(plan.target)
+
+    def _post_toggle(self, *node_ids: str):
+        # patch the toggled nodes and their children in place instead of reloading the scene
+        tid = self.current_tree.id
+        owned = self.current_char.unlocked.get(tid, set())
+        if not self._planned_mode:
+            self.storage.record_unlocks(self.current_char, tid, [(nid, nid in owned) for nid in node_ids])
+        if self._blocks:
+            changed: Set[str] = set()
+            for nid in node_ids:
+                in_view = nid in owned or (self._planned_mode and nid in self._plan_bits(tid))
+                changed.update(self._blocks.set_unlocked(nid, in_view))
+            self.canvas.update_node_states(changed, self._blocks.unlocked, self._blocks.reasons)
+        self._update_tree_row(tid)
         self._update_xp_labels()
-        self._refresh_block_reasons()
 
     # ---- planning & gate preview ----
     def _get_unlocked_for_view(self, tid: str) -> Set[str]:
-        base = set(self.current_char.unlocked.get(tid, set()))
+        # read-only view; BlockEngine keeps its own copy
+        base = self.current_char.unlocked.get(tid, set())
         if not self._planned_mode: return base
-        plan = self._planned_unlocked.setdefault(tid, set())
-        # show base union plan, but not beyond due to missing data; this is a simple preview
-        return (base | plan) - (base & set())
+        return (self.current_char.unlocked_bits(self.trees_by_id[tid]) | self._plan_bits(tid)).to_set()
+
+    def _plan_bits(self, tid: str) -> UnlockBits:
+        # the overlay follows the tree's current index (node ids may have changed since it was made)
+        index = self.trees_by_id[tid].index
+        bits = self._planned_unlocked.get(tid)
+        bits = UnlockBits(index) if bits is None else bits.rebase(index)
+        self._planned_unlocked[tid] = bits
+        return bits
 
     def _on_planning_toggled(self, checked: bool):
         self._planned_mode = checked
         if checked and self.current_tree:
-            self._planned_unlocked.setdefault(self.current_tree.id, set())
+            self._plan_bits(self.current_tree.id)
         self._on_select_char_tree()
 
+    def _on_optimize_budget(self):
+        if not self.current_char: return
+        goals = ["Most skills", "Most XP spent"]
+        goal, ok = QtWidgets.QInputDialog.getItem(self, "Optimize XP Budget", "Maximize:", goals, 0, False)
+        if not ok: return
+        weight = (lambda t, n: n.cost) if goal == goals[1] else None
+        plan = self.current_char.optimize_xp(self.trees_by_id, weight=weight)
+        if not plan.count():
+            QtWidgets.QMessageBox.information(self, "Optimize XP Budget", f"Nothing affordable with {plan.budget} XP."); return
+        # show the result as a planning overlay; committing stays a manual step
+        self._planned_unlocked = {tid: UnlockBits.from_ids(self.trees_by_id[tid].index, ids) for tid, ids in plan.nodes.items()}
+        if self.chk_planning.isChecked(): self._on_select_char_tree()
+        else: self.chk_planning.setChecked(True)
+        per_tree = "\n".join(f"  {self.trees_by_id[tid].name}: {len(ids)} skill(s)" for tid, ids in plan.nodes.items())
+        QtWidgets.QMessageBox.information(self, "Optimize XP Budget",
+            f"Planned {plan.count()} skill(s) for {plan.xp} of {plan.budget} XP:\n{per_tree}")
+
     def _on_gate_toggled(self, checked: bool):
         if not self.current_char: return
         self.canvas.set_ichor_preview(checked, self.current_char.ichor_rank)
@@ -445,6 +645,44 @@ class MainWindow(QtWidgets.QMainWindow):
         if idx >= 0: self.cmb_char.setCurrentIndex(idx)
         QtWidgets.QMessageBox.information(self, "Imported", f"Imported character '{name}'.")
 
+    def _progress_dialog(self, title: str) -> QtWidgets.QProgressDialog:
+        dlg = QtWidgets.QProgressDialog(title, "Cancel", 0, 1000, self)
+        dlg.setWindowTitle(title); dlg.setWindowModality(QtCore.Qt.WindowModal); dlg.setMinimumDuration(300)
+        return dlg
+
+    def _progress_callback(self, dlg: QtWidgets.QProgressDialog):
+        def cb(done: int, total: int, name: str) -> bool:
+            dlg.setValue(int(done * 1000 / total) if total else 1000)
+            if name: dlg.setLabelText(name)
+            QtWidgets.QApplication.processEvents()
+            return not dlg.wasCanceled()
+        return cb
+
+    def _on_export_campaign(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Campaign", "campaign.zip", "ZIP (*.zip)")
+        if not path: return
+        dlg = self._progress_dialog("Exporting campaign")
+        try: rep = self.storage.export_campaign(Path(path), self._progress_callback(dlg))
+        except Exception as e:
+            dlg.close(); QtWidgets.QMessageBox.critical(self, "Error", f"Export failed: {e}"); return
+        dlg.close()
+        if rep.cancelled: return
+        QtWidgets.QMessageBox.information(self, "Exported", f"Exported {len(rep.characters)} character(s), {len(rep.written)} file(s).")
+
+    def _on_import_campaign(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Import Campaign", "", "ZIP (*.zip)")
+        if not path: return
+        dlg = self._progress_dialog("Importing campaign")
+        try: rep = self.storage.import_campaign(Path(path), self._progress_callback(dlg))
+        except Exception as e:
+            dlg.close(); QtWidgets.QMessageBox.critical(self, "Error", f"Import failed: {e}"); return
+        dlg.close()
+        self._reload_all(); self._report_tree_errors()
+        msg = f"{len(rep.written)} file(s) imported, {len(rep.skipped)} unchanged."
+        if rep.cancelled: msg = "Import cancelled. " + msg
+        if rep.errors: msg += "\n\nErrors:\n" + "\n".join(rep.errors[:20])
+        QtWidgets.QMessageBox.information(self, "Import Campaign", msg)
+
     def _open_editor(self):
         from .editor import TreeEditorWindow
         dlg = TreeEditorWindow(self.storage, self.trees_by_id, self); dlg.exec()
@@ -452,22 +690,20 @@ class MainWindow(QtWidgets.QMainWindow):
 
     # ---- helpers ----
     def _refresh_block_reasons(self):
-        if not (self.current_char and self.current_tree): return
-        reasons: Dict[str, Optional[str]] = {}
-        for nid in self.current_tree.nodes.keys():
-            reasons[nid] = self.current_char.reasons_for(self.current_tree, nid)
-        self.canvas.apply_block_reasons(reasons)
+        if not (self.current_char and self.current_tree and self._blocks): return
+        changed = self._blocks.set_rank(self.current_char.ichor_rank)
+        self.canvas.apply_block_reasons(self._blocks.reasons, changed)
 
     def _start_autosave_timer(self):
         self._autosave = QtCore.QTimer(self); self._autosave.setInterval(20000)
         self._autosave.timeout.connect(self._autosave_tick); self._autosave.start()
 
     def _autosave_tick(self):
-        if not self.current_char: return
-        try:
-            data = self.current_char.to_dict()
-            # write next to character file
-            p = self.storage.chars_dir / f"{self.current_char.name}.autosave.json"
-            p.write_text(json.dumps(data, indent=2), encoding="utf-8")
-        except Exception:
-            pass
+        # only snapshots when the character changed; the write runs on the autosave worker
+        self._autosaver.tick(self.current_char)
+        err = self._autosaver.take_error()
+        if err: self.statusBar().showMessage(f"Autosave failed: {err}", 10000)
+
+    def closeEvent(self, e: QtGui.QCloseEvent):
+        self._autosave.stop(); self._watcher.stop(); self._autosaver.shutdown(wait=True); self.storage.thumbs.shutdown()
+        super().closeEvent(e)
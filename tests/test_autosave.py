@@ -0,0 +1,20 @@
+from __future__ import annotations
+import json
+from ishtar.core.models import Character
+from ishtar.io.autosave import Autosaver
+from ishtar.io.storage import Storage
+
+def test_reloaded_character_is_not_mistaken_for_the_saved_draft(tmp_path):
+    storage = Storage(tmp_path); saver = Autosaver(storage)
+    try:
+        assert Character("c").revision == 0
+        storage.save_character(Character("c"))
+        ch = storage.load_character("c"); ch.xp_pool = 1; ch.xp_pool = 2
+        assert saver.tick(ch) and not saver.tick(ch)
+        storage.save_character(ch); saver.mark_saved(ch)
+        ch = storage.load_character("c"); ch.xp_pool = 3; ch.xp_pool = 4  # same revision as before the save
+        assert saver.tick(ch)
+        saver._pending.result()
+        assert json.loads(storage.autosave_path("c").read_text(encoding="utf-8"))["xp_pool"] == 4
+    finally:
+        saver.shutdown()
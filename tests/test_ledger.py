@@ -0,0 +1,30 @@
+from __future__ import annotations
+import random
+from ishtar.core.models import Character, SkillTree, SkillNode
+
+def _tree(rng: random.Random, tid: str, n: int) -> SkillTree:
+    t = SkillTree(tid, tid.upper())
+    for i in range(n):
+        t.nodes[f"{tid}{i}"] = SkillNode(f"{tid}{i}", f"N{i}", rng.randrange(0, 9), "", [], 0)
+    return t
+
+def test_ledger_matches_full_sum_under_random_edits():
+    rng = random.Random(5)
+    trees = {tid: _tree(rng, tid, 12) for tid in ("a", "b", "c")}
+    ch = Character(name="x", trees=list(trees), unlocked={tid: set() for tid in trees})
+    for step in range(600):
+        tid = rng.choice(sorted(trees)); t = trees[tid]; op = rng.random()
+        if op < 0.35:
+            ch.unlock(t, rng.choice(list(t.nodes)))
+        elif op < 0.6:
+            ch.lock(t, rng.choice(list(t.nodes)))
+        elif op < 0.7:  # same-size replacement of one tree's set
+            have = ch.unlocked.get(tid, set())
+            ch.unlocked = {**ch.unlocked, tid: set(rng.sample(list(t.nodes), len(have)))}
+        elif op < 0.8:  # tree object replaced, as a catalog refresh does
+            trees[tid] = _tree(rng, tid, 12)
+        elif op < 0.9:  # cost edited in place
+            rng.choice(list(t.nodes.values())).cost = rng.randrange(0, 9); t.touch()
+        else:
+            ch.xp_spent_for_tree(t)
+        assert ch.verify_xp_ledger(trees), step
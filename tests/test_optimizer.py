@@ -0,0 +1,79 @@
+from __future__ import annotations
+import random
+from itertools import combinations
+from ishtar.core.models import SkillTree, SkillNode
+from ishtar.core.optimizer import optimize_budget
+
+def _random_case(rng: random.Random, extra_prereqs: bool):
+    trees, unlocked = [], {}
+    for tid in ("a", "b")[:rng.choice((1, 2))]:
+        t = SkillTree(tid, tid)
+        for i in range(rng.randrange(1, 7)):
+            ids = list(t.nodes)
+            pre = [rng.choice(ids)] if ids and rng.random() < 0.8 else []
+            if extra_prereqs and pre and rng.random() < 0.4:
+                pre += rng.sample(ids, rng.randrange(1, min(2, len(ids)) + 1))
+                pre = list(dict.fromkeys(pre))
+            t.nodes[f"{tid}{i}"] = SkillNode(f"{tid}{i}", "", rng.randrange(0, 5), "", pre, rng.choice((0, 0, 0, 1)))
+        have = set()
+        for nid, n in t.nodes.items():  # a legal owned set to start from
+            if all(p in have for p in n.prereq) and rng.random() < 0.3: have.add(nid)
+        trees.append(t); unlocked[tid] = have
+    return trees, unlocked
+
+def _brute(trees, unlocked, budget, rank, w):
+    # best weight over every prerequisite-closed purchase within the budget
+    cands = [(t, nid) for t in trees for nid, n in t.nodes.items() if nid not in unlocked[t.id] and n.ichor_rank <= rank]
+    best = 0.0
+    for k in range(len(cands) + 1):
+        for pick in combinations(cands, k):
+            if sum(t.nodes[nid].cost for t, nid in pick) > budget: continue
+            have = {t.id: set(unlocked[t.id]) for t in trees}
+            for t, nid in pick: have[t.id].add(nid)
+            if all(p in have[t.id] for t, nid in pick for p in t.nodes[nid].prereq):
+                best = max(best, sum(w(t, t.nodes[nid]) for t, nid in pick))
+    return best
+
+def _check_legal(trees, unlocked, plan, budget, rank):
+    by_id = {t.id: t for t in trees}
+    assert plan.xp <= budget and plan.xp == sum(by_id[tid].nodes[n].cost for tid, ids in plan.nodes.items() for n in ids)
+    for tid, ids in plan.nodes.items():
+        have = set(unlocked[tid])
+        for nid in ids:  # in plan order, each step legal
+            n = by_id[tid].nodes[nid]
+            assert nid not in have and n.ichor_rank <= rank and all(p in have for p in n.prereq)
+            have.add(nid)
+
+def test_matches_brute_force_on_single_parent_trees():
+    rng = random.Random(10)
+    for case in range(300):
+        trees, unlocked = _random_case(rng, extra_prereqs=False)
+        budget = rng.randrange(0, 12); rank = rng.choice((0, 1))
+        w = (lambda t, n: 1.0) if case % 2 else (lambda t, n: float(n.cost))
+        plan = optimize_budget(trees, unlocked, budget, rank, w)
+        _check_legal(trees, unlocked, plan, budget, rank)
+        assert plan.weight == _brute(trees, unlocked, budget, rank, w), case
+
+def test_never_plans_a_node_without_all_its_prerequisites():
+    rng = random.Random(11)
+    for case in range(300):
+        trees, unlocked = _random_case(rng, extra_prereqs=True)
+        budget = rng.randrange(0, 12); rank = rng.choice((0, 1))
+        plan = optimize_budget(trees, unlocked, budget, rank)
+        _check_legal(trees, unlocked, plan, budget, rank)
+        assert plan.weight == plan.count() <= _brute(trees, unlocked, budget, rank, lambda t, n: 1.0), case
+
+def test_shipped_multi_prerequisite_tree_plans_in_legal_order():
+    import json
+    from pathlib import Path
+    t = SkillTree.from_dict(json.loads((Path(__file__).resolve().parents[1] / "data" / "trees" / "nergals_favor.json").read_text(encoding="utf-8")))
+    total = sum(n.cost for n in t.nodes.values())
+    for budget in (total, total // 2, total // 5, 7):
+        plan = optimize_budget([t], {t.id: set()}, budget, 5)
+        _check_legal([t], {t.id: set()}, plan, budget, 5)
+    have: set = set()  # everything reachable in some legal order (shared_fate <-> twist_of_fate never is)
+    while True:
+        more = {nid for nid, n in t.nodes.items() if nid not in have and all(p in have for p in n.prereq)}
+        if not more: break
+        have |= more
+    assert "shared_fate" not in have and set(optimize_budget([t], {t.id: set()}, total, 5).nodes[t.id]) == have
@@ -0,0 +1,23 @@
+from __future__ import annotations
+import pytest
+from ishtar.core.models import SkillTree, SkillNode
+from ishtar.io.tabular import FORMATS, export_tree, iter_import_batches
+
+def _tree() -> SkillTree:
+    t = SkillTree("rt", "Round Trip")
+    for n in (
+        SkillNode("root", "Wurzel Ω", 3, "", [], 0),
+        SkillNode("a", "Ätna, \"quoted\"", 1, "first line\nsecond line, with comma\n\tand a tab", ["root"], 2),
+        SkillNode("b", "Üb;er", 0, "日本語の説明 — emoji 🩸", ["root", "a"], 5),
+        SkillNode("c", "Three", 7, "semi;colon\r\nwindows line", ["a", "b", "ghost"], 1),
+    ):
+        t.nodes[n.id] = n
+    return t
+
+@pytest.mark.parametrize("fmt", sorted(FORMATS))
+def test_export_import_round_trip(tmp_path, fmt):
+    t = _tree(); path = tmp_path / f"rt{FORMATS[fmt]}"
+    assert export_tree(t, path, fmt) == len(t.nodes)
+    batches = list(iter_import_batches(path))
+    assert [e for b in batches for e in b.errors] == []
+    assert [n for b in batches for n in b.nodes] == list(t.nodes.values())
@@ -0,0 +1,64 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+from ishtar.core.blocking import BlockEngine, NodeState
+from ishtar.core.models import Character, SkillTree, ICHOR_RANKS
+
+TREES = Path(__file__).resolve().parents[1] / "data" / "trees"
+
+def shipped(name: str) -> SkillTree:
+    return SkillTree.from_dict(json.loads((TREES / name).read_text(encoding="utf-8")))
+
+def owner(tree: SkillTree, *ids: str) -> Character:
+    return Character(name="t", trees=[tree.id], unlocked={tree.id: set(ids)}, ichor_rank=len(ICHOR_RANKS) - 1)
+
+def test_every_prerequisite_gates_an_unlock():
+    t = shipped("nergals_favor.json")
+    assert t.nodes["hex"].prereq == ["evil_eye", "breeze_of_luck"]
+    ch = owner(t, *t.path_to("evil_eye"))
+    assert ch.can_unlock(t, "hex", {t.id: t}) == (False, "Requires: breeze_of_luck")
+    assert ch.reasons_for(t, "hex") == "Requires: breeze_of_luck"
+    for nid in t.path_to("breeze_of_luck"): ch.unlock(t, nid)
+    assert ch.can_unlock(t, "hex", {t.id: t}) == (True, "OK")
+    assert ch.reasons_for(t, "hex") is None
+
+def test_block_engine_follows_every_prerequisite():
+    t = shipped("nergals_favor.json")
+    rank = len(ICHOR_RANKS) - 1
+    eng = BlockEngine(t, t.path_to("evil_eye") + t.path_to("breeze_of_luck")[:-1], rank)
+    assert eng.state("hex") == NodeState.PREREQ_BLOCKED and eng.reasons["hex"] == "Requires: breeze_of_luck"
+    assert "hex" in eng.set_unlocked("breeze_of_luck", True)
+    assert eng.state("hex") == NodeState.AVAILABLE
+    assert "hex" in eng.set_unlocked("breeze_of_luck", False)
+    assert eng.state("hex") == NodeState.PREREQ_BLOCKED
+    full = BlockEngine(t, eng.unlocked, rank)
+    assert full.states == eng.states and full.reasons == eng.reasons
+
+def legal(tree: SkillTree, have) -> bool:
+    return all(p in have for nid in have for p in tree.nodes[nid].prereq)
+
+def test_unlock_path_covers_every_prerequisite():
+    t = shipped("nergals_favor.json")
+    ch = owner(t, *t.path_to("evil_eye"))
+    plan = ch.plan_unlock(t, "hex")
+    assert plan.blocked is None and plan.nodes[-1] == "hex" and "breeze_of_luck" in plan.nodes
+    assert ch.apply_plan(t, plan) == (True, "OK")
+    assert "hex" in ch.unlocked[t.id] and legal(t, ch.unlocked[t.id])
+
+def test_unlock_paths_are_legal_for_every_shipped_node():
+    for name in ("nergals_favor.json", "hades_cloak_requisitos.json"):
+        t = shipped(name)
+        for nid in t.nodes:
+            ch = owner(t)
+            plan = ch.plan_unlock(t, nid)
+            if plan.blocked: continue
+            assert len(plan.nodes) == len(set(plan.nodes))
+            assert ch.apply_plan(t, plan) == (True, "OK"), nid
+            assert nid in ch.unlocked[t.id] and legal(t, ch.unlocked[t.id]), nid
+
+def test_apply_plan_refuses_unmet_prerequisites():
+    t = shipped("nergals_favor.json")
+    ch = owner(t, *t.path_to("evil_eye"))
+    plan = ch.plan_unlock(t, "hex"); plan.nodes = ["hex"]  # as a first-prerequisite-only planner built it
+    assert ch.apply_plan(t, plan) == (False, "Requires: breeze_of_luck")
+    assert "hex" not in ch.unlocked[t.id]
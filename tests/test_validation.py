@@ -0,0 +1,31 @@
+from __future__ import annotations
+import random
+from collections import Counter
+from ishtar.core.models import SkillTree, SkillNode
+from ishtar.core.validation import IncrementalValidator, diagnose_tree, node_specs
+
+def _random_prereqs(rng: random.Random, ids, nid):
+    pool = list(ids) + [f"ghost{i}" for i in range(5)] + [nid]
+    return [rng.choice(pool) for _ in range(rng.choice((0, 1, 1, 2, 3)))]
+
+def test_incremental_matches_full_validation_with_multi_prereqs():
+    rng = random.Random(8)
+    t = SkillTree("t", "T")
+    for i in range(60):
+        nid = f"n{i}"
+        t.nodes[nid] = SkillNode(nid, nid, 1, "", _random_prereqs(rng, t.nodes, nid), rng.choice((0, 1, 2, 99)))
+    v = IncrementalValidator(); v.reset(node_specs(t))
+    for step in range(400):
+        op = rng.random(); ids = list(t.nodes)
+        if op < 0.3:  # add, sometimes re-using an id other nodes already name
+            nid = rng.choice([f"ghost{i}" for i in range(5)] + [f"m{step}"])
+            if nid in t.nodes: continue
+            t.nodes[nid] = SkillNode(nid, nid, 1, "", _random_prereqs(rng, ids, nid), 0)
+        elif op < 0.6 and ids:  # remove
+            nid = rng.choice(ids); del t.nodes[nid]
+        elif ids:  # re-point prereqs
+            nid = rng.choice(ids); t.nodes[nid].prereq = _random_prereqs(rng, ids, nid)
+        else:
+            continue
+        t.touch(); v.apply(node_specs(t, [nid]))
+        assert Counter(v.diagnostics()) == Counter(diagnose_tree(t)), step